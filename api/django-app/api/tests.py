@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from ninja.errors import HttpError
+
+from api.utils.pagination import decode_cursor, encode_cursor, keyset_filter, keyset_paginate
+from api.utils.rate_limiter import RatePolicy, parse_policy, parse_rate
+from problems.models import Problem
+
+
+class CursorTest(SimpleTestCase):
+
+    def test_round_trip(self):
+        values = {'difficulty': 2, 'id': 41}
+        cursor = encode_cursor(values)
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decode_cursor(cursor, ('difficulty', 'id')), values)
+
+    def test_descending_field_names(self):
+        cursor = encode_cursor({'difficulty': 3, 'id': 7})
+        self.assertEqual(decode_cursor(cursor, ('-difficulty', '-id')), {'difficulty': 3, 'id': 7})
+
+    def test_invalid_cursors(self):
+        cases = [
+            'not base64 !!',
+            encode_cursor({'id': 1})[:-2] + '@@',
+            'W10',  # []
+            encode_cursor({'id': 1}),  # maydon yetishmaydi
+            encode_cursor({'difficulty': 1, 'id': 1, 'extra': 1}),
+            encode_cursor({'difficulty': '1', 'id': 1}),
+            encode_cursor({'difficulty': True, 'id': 1}),
+            encode_cursor({'difficulty': None, 'id': 1}),
+        ]
+        for cursor in cases:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(HttpError) as ctx:
+                    decode_cursor(cursor, ('difficulty', 'id'))
+                self.assertEqual(ctx.exception.status_code, 400)
+
+    def test_keyset_filter_shape(self):
+        condition = keyset_filter(('difficulty', '-id'), {'difficulty': 2, 'id': 5})
+        self.assertEqual(
+            str(condition),
+            "(OR: ('difficulty__gt', 2), (AND: ('id__lt', 5), ('difficulty', 2)))",
+        )
+
+
+class KeysetPaginateTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username='pager', email='pager@example.com', password='x')
+        # Har difficulty da bir nechta masala — tartib kalitida tenglik (tie) bor
+        cls.problems = [
+            Problem.objects.create(title=f'Masala {i}', description='', user=user, difficulty=difficulty)
+            for i, difficulty in enumerate([2, 1, 3, 2, 1, 2, 3, 1, 2])
+        ]
+
+    def walk(self, fields, page_size):
+        pages, cursor = [], None
+        while True:
+            items, cursor = keyset_paginate(Problem.objects.all(), fields, cursor, page_size)
+            pages.append([p.pk for p in items])
+            if cursor is None:
+                return pages
+
+    def expected(self, fields):
+        return list(Problem.objects.order_by(*fields).values_list('pk', flat=True))
+
+    def test_pages_cover_everything_once_with_ties(self):
+        for fields in [('id',), ('difficulty', 'id'), ('-id',), ('-difficulty', 'id'), ('-difficulty', '-id')]:
+            for page_size in (1, 2, 4, 9, 20):
+                with self.subTest(fields=fields, page_size=page_size):
+                    pages = self.walk(fields, page_size)
+                    self.assertEqual([pk for page in pages for pk in page], self.expected(fields))
+                    self.assertTrue(all(len(page) == page_size for page in pages[:-1]))
+
+    def test_last_page_has_no_cursor(self):
+        items, cursor = keyset_paginate(Problem.objects.all(), ('id',), None, len(self.problems))
+        self.assertEqual(len(items), len(self.problems))
+        self.assertIsNone(cursor)
+
+    def test_cursor_points_after_last_item(self):
+        items, cursor = keyset_paginate(Problem.objects.all(), ('difficulty', 'id'), None, 2)
+        last = items[-1]
+        self.assertEqual(decode_cursor(cursor, ('difficulty', 'id')), {'difficulty': last.difficulty, 'id': last.pk})
+
+    def test_no_count_or_offset_query(self):
+        _, cursor = keyset_paginate(Problem.objects.all(), ('id',), None, 3)
+        with self.assertNumQueries(1) as ctx:
+            keyset_paginate(Problem.objects.all(), ('id',), cursor, 3)
+        sql = ctx.captured_queries[0]['sql'].upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_invalid_page_size(self):
+        with self.assertRaises(HttpError):
+            keyset_paginate(Problem.objects.all(), ('id',), None, 0)
+
+
+class ParsePolicyTest(SimpleTestCase):
+
+    def test_fixed_window(self):
+        cases = {
+            '5/5m': RatePolicy(limit=5, window=300),
+            '1/1s': RatePolicy(limit=1, window=1),
+            '100/2h': RatePolicy(limit=100, window=7200),
+            '1000/1d': RatePolicy(limit=1000, window=86400),
+        }
+        for rate, policy in cases.items():
+            with self.subTest(rate=rate):
+                self.assertEqual(parse_policy(rate), policy)
+                self.assertIsNone(parse_policy(rate).burst)
+
+    def test_burst(self):
+        self.assertEqual(parse_policy('20/1m burst=40'), RatePolicy(limit=20, window=60, burst=40))
+        self.assertEqual(parse_policy('20/1m   burst=5'), RatePolicy(limit=20, window=60, burst=5))
+
+    def test_parse_rate_ignores_options(self):
+        self.assertEqual(parse_rate('20/1m burst=40'), (20, 60))
+
+    def test_malformed(self):
+        cases = [
+            '', '5', '5/', '/1m', 'a/1m', '5/xm', '5/1', '5/1x', '5/1m/2',
+            '0/1m', '5/0m', '-1/1m',
+            '5/1m burst', '5/1m burst=', '5/1m burst=abc', '5/1m burst=0', '5/1m limit=3',
+        ]
+        for rate in cases:
+            with self.subTest(rate=rate):
+                with self.assertRaises(ValueError):
+                    parse_policy(rate)
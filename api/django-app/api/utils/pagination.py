@@ -0,0 +1,76 @@
+# ==================== api/utils/pagination.py ====================
+import base64
+import json
+from typing import Optional, Sequence
+
+from django.db.models import Q
+from ninja.errors import HttpError
+
+
+def encode_cursor(values: dict) -> str:
+    """
+    Cursor qiymatlarini shaffof bo'lmagan (opaque) stringga aylantirish
+    Masalan: {'id': 42} -> 'eyJpZCI6NDJ9'
+    """
+    raw = json.dumps(values, separators=(',', ':'), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _field_name(field: str) -> str:
+    return field.lstrip('-')
+
+
+def decode_cursor(cursor: str, fields: Sequence[str]) -> dict:
+    """Cursor stringni qayta dict ga o'girish, buzilgan bo'lsa 400"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HttpError(400, "Noto'g'ri cursor")
+
+    names = [_field_name(f) for f in fields]
+    if not isinstance(values, dict) or set(values) != set(names):
+        raise HttpError(400, "Noto'g'ri cursor")
+    if not all(isinstance(values[f], int) and not isinstance(values[f], bool) for f in names):
+        raise HttpError(400, "Noto'g'ri cursor")
+    return values
+
+
+def keyset_filter(fields: Sequence[str], values: dict) -> Q:
+    """
+    (a, b, c) > (x, y, z) shartini Q orqali qurish.
+    '-' bilan boshlangan maydon kamayish tartibida (order_by kabi) — unda `<`.
+    """
+    condition = Q()
+    for i, field in enumerate(fields):
+        name = _field_name(field)
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f"{name}__{lookup}": values[name]})
+        for prev in fields[:i]:
+            step &= Q(**{_field_name(prev): values[_field_name(prev)]})
+        condition |= step
+    return condition
+
+
+def keyset_paginate(queryset, fields: Sequence[str], cursor: Optional[str], page_size: int):
+    """
+    Keyset (cursor) pagination: COUNT(*) va OFFSET ishlatilmaydi.
+
+    Returns:
+        (items, next_cursor)
+    """
+    if page_size < 1:
+        raise HttpError(400, "page_size musbat bo'lishi kerak")
+
+    queryset = queryset.order_by(*fields)
+    if cursor:
+        queryset = queryset.filter(keyset_filter(fields, decode_cursor(cursor, fields)))
+
+    # Keyingi sahifa borligini bilish uchun bitta ortiqcha qator olamiz
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor({_field_name(f): getattr(last, _field_name(f)) for f in fields})
+    return items, next_cursor
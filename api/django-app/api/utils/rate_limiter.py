@@ -1,10 +1,16 @@
 # ==================== api/utils/rate_limiter.py ====================
+from dataclasses import dataclass
 from functools import wraps
 from django.core.cache import cache
 from django.http import JsonResponse
+from django_redis import get_redis_connection
 from ninja.errors import HttpError
+from collections import OrderedDict
 from typing import Callable
 import hashlib
+import math
+import threading
+import time
 
 
 def get_client_ip(request) -> str:
@@ -21,188 +27,419 @@ def parse_rate(rate_string: str) -> tuple:
     Rate string ni parse qilish
     Masalan: '5/5m' -> (5, 300) # 5 requests in 300 seconds
     """
-    count, period = rate_string.split('/')
+    parts = rate_string.split()
+    if not parts:
+        raise ValueError("Rate bo'sh")
+    count, period = parts[0].split('/')
     count = int(count)
-    
+
     period_map = {
         's': 1,
         'm': 60,
         'h': 3600,
         'd': 86400,
     }
-    
-    unit = period[-1]
+
+    unit = period[-1:]
+    if unit not in period_map:
+        raise ValueError(f"Noma'lum vaqt birligi: {rate_string}")
     value = int(period[:-1])
-    seconds = value * period_map.get(unit, 60)
-    
+    if count < 1 or value < 1:
+        raise ValueError(f"Limit va davr musbat bo'lishi kerak: {rate_string}")
+    seconds = value * period_map[unit]
+
     return count, seconds
 
 
+@dataclass
+class RatePolicy:
+    limit: int
+    window: int
+    burst: int = None  # berilsa — token bucket, aks holda fixed window
+
+
+def parse_policy(rate_string: str) -> RatePolicy:
+    """
+    Rate policy ni parse qilish
+    Masalan: '20/1m'          -> fixed window, 1 daqiqada 20 ta
+             '20/1m burst=40' -> token bucket: 1 daqiqada 20 token to'ladi,
+                                 bir vaqtda 40 tagacha so'rov (burst)
+    """
+    limit, window = parse_rate(rate_string)
+    burst = None
+    for option in rate_string.split()[1:]:
+        name, _, value = option.partition('=')
+        if name != 'burst':
+            raise ValueError(f"Noma'lum rate parametri: {option}")
+        burst = int(value)
+        if burst < 1:
+            raise ValueError(f"burst musbat bo'lishi kerak: {option}")
+    return RatePolicy(limit=limit, window=window, burst=burst)
+
+
+# ==================== Atomic engine ====================
+# Fixed window: GET -> tekshirish -> INCRBY -> PEXPIRE bitta Lua skriptda.
+# Redis skriptni atomik bajaradi, shuning uchun gunicorn workerlar orasida
+# poyga (race) bo'lmaydi va har so'rov faqat bitta round trip.
+# Rad etilgan so'rovlar hisoblagichni oshirmaydi.
+# partial=1 bo'lsa (lease), kvota yetmasa qolganicha beriladi.
+FIXED_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local partial = tonumber(ARGV[4])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local granted = 0
+if current + cost <= limit then
+    granted = cost
+elseif partial == 1 then
+    granted = math.max(limit - current, 0)
+end
+if granted > 0 then
+    current = redis.call('INCRBY', KEYS[1], granted)
+end
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl < 0 then
+    if current > 0 then
+        redis.call('PEXPIRE', KEYS[1], window_ms)
+    end
+    ttl = window_ms
+end
+return {granted, current, ttl}
+"""
+
+# Token bucket: holat bitta hash da (tokens, ts). Vaqt Redis TIME dan olinadi,
+# shuning uchun workerlar soatlari farq qilsa ham natija bir xil.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_per_ms = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local partial = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill_per_ms)
+local granted = 0
+local retry_ms = 0
+if tokens >= cost then
+    granted = cost
+elseif partial == 1 then
+    granted = math.floor(tokens)
+end
+if granted > 0 then
+    tokens = tokens - granted
+else
+    retry_ms = math.ceil((1 - tokens) / refill_per_ms)
+end
+local reset_ms = math.ceil((capacity - tokens) / refill_per_ms)
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], reset_ms + 1000)
+return {granted, math.floor(tokens), retry_ms, reset_ms}
+"""
+
+_scripts = {}
+
+
+def _get_script(source: str):
+    """Skript bir marta ro'yxatdan o'tadi, keyin EVALSHA orqali chaqiriladi"""
+    if source not in _scripts:
+        _scripts[source] = get_redis_connection('default').register_script(source)
+    return _scripts[source]
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int  # oyna tugashigacha (bucket to'lishigacha) soniyalar
+    retry_after: int = 0  # rad etilganda qayta urinishgacha soniyalar
+    granted: int = 1  # Redis bergan so'rovlar soni (lease uchun)
+
+    @property
+    def headers(self) -> dict:
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(self.reset),
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(self.retry_after)
+        return headers
+
+
+def consume(key: str, max_requests: int, window: int, cost: int = 1, partial: bool = False) -> RateLimitResult:
+    """
+    Limitdan `cost` ta so'rovni atomik ravishda yechish.
+    Qolgan kvota va reset vaqti bitta chaqiruvda qaytadi.
+    """
+    granted, current, ttl_ms = _get_script(FIXED_WINDOW_SCRIPT)(
+        keys=[cache.make_key(key)],
+        args=[max_requests, window * 1000, cost, int(partial)],
+    )
+    reset = math.ceil(int(ttl_ms) / 1000)
+    return RateLimitResult(
+        allowed=granted > 0,
+        limit=max_requests,
+        remaining=max(max_requests - int(current), 0),
+        reset=reset,
+        retry_after=0 if granted else reset,
+        granted=int(granted),
+    )
+
+
+def consume_token_bucket(key: str, rate: int, window: int, burst: int, cost: int = 1,
+                         partial: bool = False) -> RateLimitResult:
+    """Token bucket: `window` soniyada `rate` token to'ladi, sig'im `burst`"""
+    granted, tokens, retry_ms, reset_ms = _get_script(TOKEN_BUCKET_SCRIPT)(
+        keys=[cache.make_key(key)],
+        args=[burst, rate / (window * 1000), cost, int(partial)],
+    )
+    return RateLimitResult(
+        allowed=granted > 0,
+        limit=burst,
+        remaining=int(tokens),
+        reset=math.ceil(int(reset_ms) / 1000),
+        retry_after=math.ceil(int(retry_ms) / 1000),
+        granted=int(granted),
+    )
+
+
+def consume_policy(key: str, policy: RatePolicy, cost: int = 1, partial: bool = False) -> RateLimitResult:
+    if policy.burst:
+        # Boshqa turdagi qiymat bilan to'qnashmasligi uchun alohida kalit
+        return consume_token_bucket(f"{key}:tb", policy.limit, policy.window, policy.burst, cost, partial)
+    return consume(key, policy.limit, policy.window, cost, partial)
+
+
+def _remember_result(request, result: RateLimitResult) -> None:
+    """Header lar uchun eng qattiq (eng kam qolgan) natijani saqlash"""
+    current = getattr(request, 'rate_limit', None)
+    if current is None or not result.allowed or (current.allowed and result.remaining < current.remaining):
+        request.rate_limit = result
+
+
+def get_identifier(request) -> str:
+    if hasattr(request, 'user') and request.user.is_authenticated:
+        return f"user_{request.user.id}"
+    return f"ip_{get_client_ip(request)}"
+
+
+def _limit_decorator(rate: str, build_key: Callable, message: str):
+    """Barcha decorator lar uchun umumiy asos"""
+    policy = parse_policy(rate)
+
+    def decorator(func):
+        func_name = f"{func.__module__}.{func.__name__}"
+
+        @wraps(func)
+        def wrapper(request, *args, **kwargs):
+            result = consume_policy(build_key(request, func_name), policy)
+            _remember_result(request, result)
+            if not result.allowed:
+                raise HttpError(429, message.format(ttl=result.retry_after))
+            return func(request, *args, **kwargs)
+
+        return wrapper
+    return decorator
+
+
 def rate_limit(rate: str, key_func: Callable = None):
     """
     Rate limiting decorator
-    
+
     Args:
         rate: '5/5m' format (5 requests per 5 minutes)
+              yoki '20/1m burst=40' (token bucket)
         key_func: Custom key generation function
-    
+
     Usage:
         @rate_limit('10/1m')
         def my_view(request):
             ...
     """
-    max_requests, window = parse_rate(rate)
-    
-    def decorator(func):
-        @wraps(func)
-        def wrapper(request, *args, **kwargs):
-            # Cache key yaratish
-            if key_func:
-                cache_key = key_func(request)
-            else:
-                if hasattr(request, 'user') and request.user.is_authenticated:
-                    identifier = f"user_{request.user.id}"
-                else:
-                    identifier = f"ip_{get_client_ip(request)}"
-                
-                # Funksiya nomi bilan birga
-                func_name = f"{func.__module__}.{func.__name__}"
-                cache_key = f"rate_limit:{func_name}:{identifier}"
-            
-            # Redis dan hozirgi so'rovlar sonini olish
-            current = cache.get(cache_key, 0)
-            
-            if current >= max_requests:
-                # TTL ni olish
-                ttl = cache.ttl(cache_key)
-                raise HttpError(
-                    429,
-                    f"So'rovlar limiti oshib ketdi. {ttl} soniyadan keyin qayta urinib ko'ring."
-                )
-            
-            # So'rovlar sonini oshirish
-            if current == 0:
-                cache.set(cache_key, 1, window)
-            else:
-                cache.incr(cache_key)
-            
-            return func(request, *args, **kwargs)
-        
-        return wrapper
-    return decorator
+    def build_key(request, func_name):
+        if key_func:
+            return key_func(request)
+        # Funksiya nomi bilan birga
+        return f"rate_limit:{func_name}:{get_identifier(request)}"
+
+    return _limit_decorator(
+        rate, build_key,
+        "So'rovlar limiti oshib ketdi. {ttl} soniyadan keyin qayta urinib ko'ring.",
+    )
+
+
+class _Lease:
+    __slots__ = ('tokens', 'expires_at', 'reset_at', 'retry_at', 'result')
+
+    def __init__(self, tokens, expires_at, reset_at, retry_at, result):
+        self.tokens = tokens
+        self.expires_at = expires_at
+        self.reset_at = reset_at
+        self.retry_at = retry_at
+        self.result = result
+
+
+class LocalLeaseTier:
+    """
+    Worker ichidagi (in-process) lease hisoblagichi.
+
+    Redis dan bir martada `size` ta so'rov "ijaraga" olinadi va ular
+    lokal ravishda sarflanadi. Redis ga faqat lease tugaganda yoki muddati
+    o'tganda murojaat qilinadi. Ishlatilmagan lease qaytarilmaydi, shuning
+    uchun global limit hech qachon oshib ketmaydi (faqat biroz qattiqroq).
+    Rad etilgan kalitlar ham retry_after gacha lokal bloklanadi.
+    """
+
+    def __init__(self, size: int, ttl: float = 1.0, max_keys: int = 10000):
+        self.size = size
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._leases = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str):
+        """Lokal lease dan bitta so'rov olish, bo'lmasa None"""
+        now = time.monotonic()
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is None or lease.expires_at <= now:
+                return None
+            self._leases.move_to_end(key)
+            result = lease.result
+            reset = max(math.ceil(lease.reset_at - now), 0)
+            if not result.allowed:
+                # Lokal blok faqat Redis ga murojaatni tejaydi — kutish vaqti umumiy bucket niki
+                retry_after = max(math.ceil(lease.retry_at - now), 1)
+                return RateLimitResult(False, result.limit, 0, reset, retry_after, 0)
+            if lease.tokens <= 0:
+                return None
+            lease.tokens -= 1
+            # Redis dagi qoldiq lease ni allaqachon chiqarib tashlagan; lokal sarflanganlar
+            # ham ayriladi, shunda Remaining so'rovdan so'rovga faqat kamayadi
+            spent = result.granted - 1 - lease.tokens
+            return RateLimitResult(
+                allowed=True,
+                limit=result.limit,
+                remaining=max(result.remaining - spent, 0),
+                reset=reset,
+            )
+
+    def store(self, key: str, result: RateLimitResult) -> None:
+        now = time.monotonic()
+        if result.allowed:
+            # Bittasi joriy so'rov uchun sarflandi
+            tokens = result.granted - 1
+            expires_at = now + min(self.ttl, result.reset)
+        else:
+            tokens = 0
+            expires_at = now + min(self.ttl, result.retry_after)
+        with self._lock:
+            self._leases[key] = _Lease(tokens, expires_at, now + result.reset, now + result.retry_after, result)
+            self._leases.move_to_end(key)
+            while len(self._leases) > self.max_keys:
+                self._leases.popitem(last=False)
 
 
 class RateLimiter:
     """
     Class-based rate limiter
-    
+
     Usage:
         limiter = RateLimiter('10/1m')
         if not limiter.is_allowed(request):
             raise HttpError(429, "Too many requests")
+
+        # Ikki bosqichli rejim: har worker Redis dan 20 tadan lease oladi
+        limiter = RateLimiter('1000/1m', lease=20, lease_ttl=2)
     """
-    
-    def __init__(self, rate: str):
-        self.max_requests, self.window = parse_rate(rate)
-    
+
+    def __init__(self, rate: str, lease: int = 0, lease_ttl: float = 1.0):
+        self.policy = parse_policy(rate)
+        self.max_requests, self.window = self.policy.limit, self.policy.window
+        self.local = LocalLeaseTier(lease, lease_ttl) if lease > 1 else None
+
     def get_cache_key(self, request, prefix: str = 'rate_limit') -> str:
         """Cache key yaratish"""
-        if hasattr(request, 'user') and request.user.is_authenticated:
-            identifier = f"user_{request.user.id}"
+        return f"{prefix}:{get_identifier(request)}"
+
+    def hit(self, request, custom_key: str = None) -> RateLimitResult:
+        """Bitta so'rovni hisoblash va to'liq natijani qaytarish"""
+        cache_key = custom_key or self.get_cache_key(request)
+        if self.local is None:
+            result = consume_policy(cache_key, self.policy)
         else:
-            identifier = f"ip_{get_client_ip(request)}"
-        
-        return f"{prefix}:{identifier}"
-    
+            result = self.local.take(cache_key)
+            if result is None:
+                result = consume_policy(cache_key, self.policy, cost=self.local.size, partial=True)
+                self.local.store(cache_key, result)
+        _remember_result(request, result)
+        return result
+
     def is_allowed(self, request, custom_key: str = None) -> tuple[bool, int]:
         """
         Rate limit tekshirish
-        
+
         Returns:
             (is_allowed, remaining_requests)
         """
-        cache_key = custom_key or self.get_cache_key(request)
-        current = cache.get(cache_key, 0)
-        
-        if current >= self.max_requests:
-            return False, 0
-        
-        if current == 0:
-            cache.set(cache_key, 1, self.window)
-        else:
-            cache.incr(cache_key)
-        
-        remaining = self.max_requests - (current + 1)
-        return True, remaining
-    
+        result = self.hit(request, custom_key)
+        return result.allowed, result.remaining
+
     def get_wait_time(self, request, custom_key: str = None) -> int:
         """Kutish vaqtini olish (soniyalarda)"""
         cache_key = custom_key or self.get_cache_key(request)
+        if self.policy.burst:
+            # Kalit TTL i — bucket to'liq to'lishigacha. Keyingi token gacha vaqtni
+            # skriptning o'zi hisoblaydi (cost=0 — token yechilmaydi)
+            result = consume_policy(cache_key, self.policy, cost=0)
+            return max(result.retry_after, 0)
         return cache.ttl(cache_key) or 0
 
 
 # ==================== IP based rate limiting ====================
 def rate_limit_by_ip(rate: str):
     """Faqat IP manzil bo'yicha rate limiting"""
-    max_requests, window = parse_rate(rate)
-    
-    def decorator(func):
-        @wraps(func)
-        def wrapper(request, *args, **kwargs):
-            ip = get_client_ip(request)
-            func_name = f"{func.__module__}.{func.__name__}"
-            cache_key = f"rate_limit:ip:{func_name}:{ip}"
-            
-            current = cache.get(cache_key, 0)
-            
-            if current >= max_requests:
-                ttl = cache.ttl(cache_key)
-                raise HttpError(
-                    429,
-                    f"IP manzil uchun so'rovlar limiti oshdi. {ttl}s kutib turing."
-                )
-            
-            if current == 0:
-                cache.set(cache_key, 1, window)
-            else:
-                cache.incr(cache_key)
-            
-            return func(request, *args, **kwargs)
-        
-        return wrapper
-    return decorator
+    def build_key(request, func_name):
+        return f"rate_limit:ip:{func_name}:{get_client_ip(request)}"
+
+    return _limit_decorator(
+        rate, build_key,
+        "IP manzil uchun so'rovlar limiti oshdi. {ttl}s kutib turing.",
+    )
 
 
 # ==================== User based rate limiting ====================
 def rate_limit_by_user(rate: str):
     """Faqat foydalanuvchi ID bo'yicha rate limiting"""
-    max_requests, window = parse_rate(rate)
-    
-    def decorator(func):
-        @wraps(func)
-        def wrapper(request, *args, **kwargs):
-            if not hasattr(request, 'user') or not request.user.is_authenticated:
-                raise HttpError(401, "Authentication required")
-            
-            user_id = request.user.id
-            func_name = f"{func.__module__}.{func.__name__}"
-            cache_key = f"rate_limit:user:{func_name}:{user_id}"
-            
-            current = cache.get(cache_key, 0)
-            
-            if current >= max_requests:
-                ttl = cache.ttl(cache_key)
-                raise HttpError(
-                    429,
-                    f"Foydalanuvchi limiti oshdi. {ttl}s kutib turing."
-                )
-            
-            if current == 0:
-                cache.set(cache_key, 1, window)
-            else:
-                cache.incr(cache_key)
-            
-            return func(request, *args, **kwargs)
-        
-        return wrapper
-    return decorator
\ No newline at end of file
+    def build_key(request, func_name):
+        if not hasattr(request, 'user') or not request.user.is_authenticated:
+            raise HttpError(401, "Authentication required")
+        return f"rate_limit:user:{func_name}:{request.user.id}"
+
+    return _limit_decorator(
+        rate, build_key,
+        "Foydalanuvchi limiti oshdi. {ttl}s kutib turing.",
+    )
+
+
+# ==================== Response headers ====================
+class RateLimitHeadersMiddleware:
+    """
+    Rate limit natijasini javobga X-RateLimit-* va Retry-After header lari
+    sifatida qo'shadi (Ninja 429 javoblari ham shu yerdan o'tadi).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        result = getattr(request, 'rate_limit', None)
+        if result is not None:
+            for header, value in result.headers.items():
+                response[header] = value
+        return response
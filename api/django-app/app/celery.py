@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import celeryd_init
 
 # Django settings
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
@@ -27,6 +28,29 @@ app.conf.update(
     worker_max_tasks_per_child=1000,
 )
 
+@celeryd_init.connect
+def configure_video_worker(sender=None, conf=None, options=None, **kwargs):
+    """
+    Faqat 'video' navbatini o'qiydigan worker uchun concurrency yadrolar soniga
+    bog'lanadi: har ffmpeg o'zi bir nechta thread ishlatadi, shuning uchun
+    yadrolar soni / VIDEO_THREADS_PER_TASK ta task bir vaqtda.
+    -c/--concurrency berilgan bo'lsa, o'sha ishlatiladi.
+    """
+    options = options or {}
+    queues = options.get('queues') or []
+    if isinstance(queues, str):
+        queues = queues.split(',')
+    if options.get('concurrency') or set(queues) != {'video'}:
+        return
+    from django.conf import settings
+
+    concurrency = getattr(settings, 'VIDEO_WORKER_CONCURRENCY', 0)
+    if not concurrency:
+        threads = max(1, getattr(settings, 'VIDEO_THREADS_PER_TASK', 4))
+        concurrency = max(1, (os.cpu_count() or 1) // threads)
+    conf.worker_concurrency = concurrency
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
\ No newline at end of file
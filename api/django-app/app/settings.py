@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from decouple import config
+from kombu import Queue
 from django.utils.translation import gettext_lazy as _
 from django.core.management.utils import get_random_secret_key
 
@@ -61,6 +62,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.utils.rate_limiter.RateLimitHeadersMiddleware',
     # 'users.middleware.CookieJWTAuth',  # Sizning maxsus middleware
 ]
 
@@ -89,6 +91,14 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+# Frontend rate limit header larini o'qiy olishi uchun
+CORS_EXPOSE_HEADERS = [
+    'x-ratelimit-limit',
+    'x-ratelimit-remaining',
+    'x-ratelimit-reset',
+    'retry-after',
+]
+
 
 
 ROOT_URLCONF = 'app.urls'
@@ -165,6 +175,24 @@ CACHES = {
     }
 }
 
+# Problem detail payload keshi (versiya signal orqali oshiriladi)
+PROBLEM_DETAIL_CACHE_TIMEOUT = config('PROBLEM_DETAIL_CACHE_TIMEOUT', cast=int, default=60 * 60)
+# Foydalanuvchi yechgan masalalar Redis SET i
+SOLVED_SET_CACHE_TIMEOUT = config('SOLVED_SET_CACHE_TIMEOUT', cast=int, default=24 * 60 * 60)
+# Auth server tasdiqlagan tokenlar keshi (soniya)
+AUTH_VERIFY_CACHE_TTL = config('AUTH_VERIFY_CACHE_TTL', cast=int, default=300)
+AUTH_VERIFY_NEGATIVE_TTL = config('AUTH_VERIFY_NEGATIVE_TTL', cast=int, default=30)
+# 'remote' yoki 'local' (imzo + muddat + lokal revocation list, utils/revocation.py)
+AUTH_VERIFY_MODE = config('AUTH_VERIFY_MODE', default='remote')
+AUTH_JWKS_URL = config('AUTH_JWKS_URL', default='')
+AUTH_JWKS_CACHE_TTL = config('AUTH_JWKS_CACHE_TTL', cast=int, default=3600)
+AUTH_JWT_ALGORITHMS = config('AUTH_JWT_ALGORITHMS', default='RS256', cast=lambda v: [a.strip() for a in v.split(',')])
+AUTH_REVOCATION_CACHE_TIMEOUT = config('AUTH_REVOCATION_CACHE_TIMEOUT', cast=int, default=15 * 60)
+AUTH_REVOCATION_LOCAL_TTL = config('AUTH_REVOCATION_LOCAL_TTL', cast=int, default=10)
+# telegram_id -> BaseUser.pk keshi va last_login buferi (users/cache.py)
+IDENTITY_CACHE_TIMEOUT = config('IDENTITY_CACHE_TIMEOUT', cast=int, default=24 * 60 * 60)
+LOGIN_ACTIVITY_FLUSH_INTERVAL = config('LOGIN_ACTIVITY_FLUSH_INTERVAL', cast=int, default=5)
+
 # Session backend
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
@@ -189,6 +217,37 @@ CELERY_TASK_SOFT_TIME_LIMIT = 25 * 60  # 25 minutes
 CELERY_WORKER_PREFETCH_MULTIPLIER = 4
 CELERY_WORKER_MAX_TASKS_PER_CHILD = 1000
 
+# Navbatlar: 'default' — tez, so'rov bilan bog'liq fon ishlari;
+# 'video' — CPU og'ir ffmpeg tasklari, alohida worker da (-Q video)
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_QUEUES = [
+    Queue('default', routing_key='default'),
+    Queue('video', routing_key='video'),
+]
+CELERY_TASK_ROUTES = {
+    'problems.tasks.process_video': {'queue': 'video'},
+    'problems.tasks.encode_video_chunk': {'queue': 'video'},
+    'problems.tasks.finalize_chunked_video': {'queue': 'video'},
+    'videos.videos.process_video': {'queue': 'video'},
+}
+# Redis broker da priority: 0 — eng yuqori, 9 — eng past
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'queue_order_strategy': 'priority',
+    'priority_steps': list(range(10)),
+    'sep': ':',
+}
+CELERY_TASK_DEFAULT_PRIORITY = 5
+# video worker concurrency (0 — yadrolar soni / VIDEO_THREADS_PER_TASK), app/celery.py
+VIDEO_WORKER_CONCURRENCY = config('VIDEO_WORKER_CONCURRENCY', cast=int, default=0)
+VIDEO_THREADS_PER_TASK = config('VIDEO_THREADS_PER_TASK', cast=int, default=4)
+CELERY_BEAT_SCHEDULE = {}
+if AUTH_VERIFY_MODE == 'local':
+    # Revocation list faqat lokal tekshiruvda kerak — remote rejimda auth server bezovta qilinmaydi
+    CELERY_BEAT_SCHEDULE['refresh-revoked-tokens'] = {
+        'task': 'users.tasks.refresh_revoked_tokens',
+        'schedule': config('AUTH_REVOCATION_REFRESH_INTERVAL', cast=int, default=60),
+    }
+
 
 # UNFOLD settings
 UNFOLD = get_unfoldadmin_settings()
@@ -229,6 +288,11 @@ AWS_S3_FILE_OVERWRITE = False
 AWS_S3_CUSTOM_DOMAIN = config("MINIO_PUBLIC_DOMAIN")
 
 AWS_STORAGE_BUCKET_NAME = 'media'
+# HLS papkalarini yuklashda parallel thread lar va har obyekt uchun qayta urinishlar (utils/s3.py)
+S3_UPLOAD_WORKERS = config('S3_UPLOAD_WORKERS', cast=int, default=16)
+S3_UPLOAD_RETRIES = config('S3_UPLOAD_RETRIES', cast=int, default=3)
+# Brauzer uchun presigned URL lar shu manzil bilan imzolanadi (Host imzoga kiradi)
+S3_PRESIGN_ENDPOINT_URL = config('MINIO_PRESIGN_ENDPOINT', default=AWS_S3_CUSTOM_DOMAIN)
 
 
 STORAGES = {
@@ -263,12 +327,52 @@ VIDEO_THUMBNAILS_PATH = 'videos/thumbnails/'
 FFMPEG_PATH = config('FFMPEG_PATH', default='/usr/bin/ffmpeg')
 FFPROBE_PATH = config('FFPROBE_PATH', default='/usr/bin/ffprobe')
 
+# 'single_pass' | 'parallel' | 'serial' (problems/tasks.py: encode_hls)
+VIDEO_ENCODE_MODE = config('VIDEO_ENCODE_MODE', default='single_pass')
+# parallel rejimda bir vaqtda ishlaydigan ffmpeg lar soni (0 — yadrolar soni)
+VIDEO_ENCODE_WORKERS = config('VIDEO_ENCODE_WORKERS', cast=int, default=0)
+# Shundan uzun videolar bo'laklarga bo'linib, bir nechta worker da kodlanadi (0 — o'chirilgan)
+VIDEO_CHUNKED_MIN_DURATION = config('VIDEO_CHUNKED_MIN_DURATION', cast=int, default=600)
+# Bitta bo'lak uzunligi (soniya). Kesish keyframe larda bo'lgani uchun taxminiy
+VIDEO_CHUNK_DURATION = config('VIDEO_CHUNK_DURATION', cast=int, default=120)
+# process_video qayta urinishlari — har safar oxirgi tugagan bosqichdan davom etadi
+VIDEO_MAX_RETRIES = config('VIDEO_MAX_RETRIES', cast=int, default=3)
+VIDEO_RETRY_DELAY = config('VIDEO_RETRY_DELAY', cast=int, default=60)
+# Bir xil asl fayl (SHA-256) qayta yuklansa, mavjud HLS renditionlari ishlatiladi
+VIDEO_DEDUPLICATE = config('VIDEO_DEDUPLICATE', cast=bool, default=True)
+# Tayyor segmentlar kodlash tugashini kutmasdan S3 ga yuklanadi
+VIDEO_PIPELINED_UPLOAD = config('VIDEO_PIPELINED_UPLOAD', cast=bool, default=True)
+# 'stream' — ffmpeg manbani presigned MinIO URL dan o'qiydi, 'download' — avval temp faylga
+VIDEO_SOURCE_MODE = config('VIDEO_SOURCE_MODE', default='stream')
+VIDEO_SOURCE_URL_EXPIRES = config('VIDEO_SOURCE_URL_EXPIRES', cast=int, default=6 * 60 * 60)
+# ffmpeg -progress dan olingan foiz: Redis ga har N soniyada, DB ga kamroq (soniya)
+VIDEO_PROGRESS_INTERVAL = config('VIDEO_PROGRESS_INTERVAL', cast=int, default=2)
+VIDEO_PROGRESS_DB_INTERVAL = config('VIDEO_PROGRESS_DB_INTERVAL', cast=int, default=15)
+# Brauzerdan to'g'ridan-to'g'ri MinIO ga multipart upload (problems/uploads.py)
+VIDEO_UPLOAD_PART_SIZE = config('VIDEO_UPLOAD_PART_SIZE', cast=int, default=64 * 1024 * 1024)
+VIDEO_UPLOAD_MAX_SIZE = config('VIDEO_UPLOAD_MAX_SIZE', cast=int, default=20 * 1024 * 1024 * 1024)
+VIDEO_UPLOAD_URL_EXPIRES = config('VIDEO_UPLOAD_URL_EXPIRES', cast=int, default=6 * 60 * 60)
+
+# Scrubbing preview sprite sheet idagi kadrlar oralig'i (soniya)
+VIDEO_PREVIEW_INTERVAL = config('VIDEO_PREVIEW_INTERVAL', cast=int, default=10)
+# To'liq ladder (oddiy kontent uchun). problems/ladder.py har video uchun undan
+# upscale va ortiqcha rung larni tashlab, bitrate larni murakkablikka moslaydi
+VIDEO_ADAPTIVE_LADDER = config('VIDEO_ADAPTIVE_LADDER', cast=bool, default=True)
+VIDEO_COMPLEXITY_SAMPLES = config('VIDEO_COMPLEXITY_SAMPLES', cast=int, default=3)
 VIDEO_QUALITIES = [
     {'name': '360p', 'width': 640, 'height': 360, 'bitrate': '800k'},
     {'name': '480p', 'width': 854, 'height': 480, 'bitrate': '1400k'},
     {'name': '720p', 'width': 1280, 'height': 720, 'bitrate': '2800k'},
     {'name': '1080p', 'width': 1920, 'height': 1080, 'bitrate': '5000k'},
 ]
+# Encoder profili (problems/profiles.py): fast, balanced, quality, screencast, event, cmaf.
+# Video.encoder_profile bo'sh bo'lsa shu ishlatiladi
+VIDEO_ENCODER_PROFILE = config('VIDEO_ENCODER_PROFILE', default='balanced')
+# Qo'shimcha/o'zgartirilgan profillar: {'nomi': {'preset': ..., 'crf': ...}}
+VIDEO_ENCODER_PROFILES = {}
+# HLS segment konteyneri: 'ts' yoki 'fmp4' (CMAF, #EXT-X-MAP). fMP4 ni faqat bitta
+# profil uchun yoqish — 'cmaf' profili yoki VIDEO_ENCODER_PROFILES da container='fmp4'
+VIDEO_HLS_CONTAINER = config('VIDEO_HLS_CONTAINER', default='ts')
 
 # ==========================================
 # AUTH
@@ -1,5 +1,5 @@
 from django.shortcuts import get_object_or_404
-from django.db.models import Prefetch, Count, Q
+from django.db.models import Prefetch, Count
 from ninja import Router, Query
 from typing import Optional
 
@@ -7,6 +7,7 @@ from .models import Course, Modules, Enrollment
 from lessons.models import Lesson
 from .schemas import CourseDetailSchema, CourseListResponseSchema
 from api.utils.rate_limiter import rate_limit
+from utils.search import search_queryset
 
 router = Router(tags=["Courses"])
 
@@ -25,9 +26,7 @@ def list_courses(request, search: Optional[str] = Query(None)):
     )
 
     if search:
-        queryset = queryset.filter(
-            Q(title__icontains=search) | Q(description__icontains=search)
-        )
+        queryset = search_queryset(queryset, search)
 
     enrolled_ids = set()
     if request.user.is_authenticated:
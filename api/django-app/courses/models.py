@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.text import slugify
 from martor.models import MartorField
@@ -17,6 +18,8 @@ class Course(TimeMixsin):
 
     lesson_count = models.PositiveIntegerField(blank=True, null=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Full-text qidiruv uchun (utils/search.py), GIN indeks migratsiyada
+    search_vector = SearchVectorField(null=True, editable=False)
     
     def __str__(self):
         return self.title
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from utils.search import update_search_index, remove_from_search_index
+from .models import Course
+
+
+@receiver(post_save, sender=Course)
+def course_search_index_handler(sender, instance, update_fields=None, **kwargs):
+    update_search_index(instance, update_fields)
+
+
+@receiver(post_delete, sender=Course)
+def course_search_index_delete_handler(sender, instance, **kwargs):
+    remove_from_search_index(instance)
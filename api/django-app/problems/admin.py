@@ -1,6 +1,8 @@
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
+from django.urls import reverse
 from .tasks import process_video
+from .progress import get_cached_progress_many
 from django.contrib import admin
 from unfold.admin import ModelAdmin, StackedInline
 from martor.widgets import AdminMartorWidget
@@ -79,7 +81,7 @@ class VideoAdmin(ModelAdmin):
     search_fields = ['title', 'description']
     readonly_fields = [
         'id', 'slug', 'duration', 'width', 'height', 'fps', 'bitrate',
-        'codec', 'file_size', 'processing_progress', 'processing_error',
+        'codec', 'file_size', 'processing_progress', 'processing_stage', 'processing_error',
         'hls_playlist', 'processed_at', 'thumbnail_preview_large',
         'video_preview', 'qualities_display'
     ]
@@ -92,7 +94,7 @@ class VideoAdmin(ModelAdmin):
             'fields': ('original_file', 'thumbnail')
         }),
         ('Status', {
-            'fields': ('status', 'processing_progress', 'processing_error')
+            'fields': ('status', 'encoder_profile', 'processing_progress', 'processing_stage', 'processing_error')
         }),
         ('Video Maʼlumotlari', {
             'fields': ('duration', 'width', 'height', 'fps', 'bitrate', 'codec', 'file_size'),
@@ -112,6 +114,15 @@ class VideoAdmin(ModelAdmin):
 
     actions = ['reprocess_videos', 'delete_processed_files']
 
+    def get_changelist_instance(self, request):
+        """Sahifadagi processing videolar progressi bitta kesh so'rovida olinadi"""
+        cl = super().get_changelist_instance(request)
+        videos = list(cl.result_list)
+        progress = get_cached_progress_many([v.id for v in videos if v.status == 'processing'])
+        for video in videos:
+            video.cached_progress = progress.get(video.id)
+        return cl
+
     # === Custom display methods ===
     def thumbnail_preview(self, obj):
         if obj.thumbnail:
@@ -142,11 +153,25 @@ class VideoAdmin(ModelAdmin):
         }
         color = colors.get(obj.status, '#6c757d')
         icon = icons.get(obj.status, '❔')
-        return format_html(
+        badge = format_html(
             '<span style="background:{};color:white;padding:3px 8px;'
             'border-radius:12px;font-size:11px;font-weight:bold;">{} {}</span>',
             color, icon, obj.get_status_display()
         )
+        if obj.status != 'processing':
+            return badge
+        # Foiz keshdan (get_changelist_instance), yo'q bo'lsa yuklangan DB qiymati;
+        # sahifani yangilamasdan polling endpoint orqali yangilanib turadi
+        progress = getattr(obj, 'cached_progress', None) or {}
+        return format_html(
+            '{} <span id="progress-{}" style="font-size:11px;">{}%</span>'
+            '<script>(function(){{var el=document.getElementById("progress-{}");'
+            'var t=setInterval(function(){{fetch("{}").then(function(r){{return r.json();}})'
+            '.then(function(d){{el.textContent=d.progress+"%";if(d.status!=="processing")clearInterval(t);}})'
+            '.catch(function(){{clearInterval(t);}});}},3000);}})();</script>',
+            badge, obj.id, progress.get('progress', obj.processing_progress), obj.id,
+            reverse('api-1.0.0:video_progress', kwargs={'video_id': obj.id}),
+        )
     status_badge.short_description = "Status"
 
     def duration_display(self, obj):
@@ -215,7 +240,7 @@ class VideoAdmin(ModelAdmin):
             return "Sifatlar mavjud emas"
         html = ''.join([
             f"<li>{'✅' if q.is_ready else '⏳'} <strong>{q.quality}</strong> "
-            f"({q.width}×{q.height}, {q.bitrate})</li>"
+            f"({q.width}×{q.height}, {q.bitrate}, {q.get_container_display()})</li>"
             for q in qs
         ])
         return mark_safe(f"<ul>{html}</ul>")
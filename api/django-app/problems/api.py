@@ -1,5 +1,8 @@
 # ==================== api/problems.py ====================
+import uuid
+
 from ninja import Router, Query
+from ninja.security import django_auth
 from ninja.pagination import paginate, PageNumberPagination
 from ninja.errors import HttpError
 from django.shortcuts import get_object_or_404
@@ -10,13 +13,44 @@ from django.core.paginator import Paginator
 from problems.models import Problem, Function, Language, Category, Hint, Challenge, Examples, Video, VideoQuality
 from api.utils.auth import JWTAuth
 from api.utils.rate_limiter import rate_limit
+from api.utils.pagination import keyset_paginate
 from problems.schemas import *
+from problems.cache import get_problem_detail, set_problem_detail
+from problems.progress import get_progress
+from problems.profiles import get_profiles
+from problems.uploads import UploadError, cancel_upload, finish_upload, start_upload
+from userstatus.cache import solved_among
 from quizs.models import Question
 from utils.auth import JWTBearer
+from utils.search import search_queryset
 
 router = Router(tags=["Problems"])
 
+# Cursor rejimida ruxsat etilgan tartiblar.
+# (difficulty, id) — Problem dagi (is_active, difficulty) indeksidan foydalanadi
+CURSOR_ORDERINGS = {
+    "id": ("id",),
+    "difficulty": ("difficulty", "id"),
+}
+
+
+def _completed_ids(request, problem_ids):
+    """Foydalanuvchi yechgan masalalar — faqat berilgan id lar orasidan"""
+    if not request.user.is_authenticated:
+        return set()
+    return solved_among(request.user.id, problem_ids)
+
 
+def _problem_list_item(p, user_completed):
+    return {
+        "title": p.title,
+        "slug": p.slug,
+        "difficulty": p.difficulty,
+        "points": p.points,
+        "category": p.category.name if p.category else None,
+        "is_completed": p.id in user_completed,
+        "tags": [t.name for t in p.tags.all()],
+    }
 
 
 @router.get("/")
@@ -29,6 +63,10 @@ def list_problems(
     language: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
     tags: Optional[str] = Query(None),
+    pagination: str = Query("page", description="'page' yoki 'cursor'"),
+    cursor: Optional[str] = Query(None),
+    ordering: str = Query("id", description="Cursor rejimi uchun: 'id' yoki 'difficulty'"),
+    include_total: bool = Query(False, description="Cursor rejimida COUNT(*) ni qaytarish"),
 ):
 
     queryset = Problem.objects.filter(is_active=True) \
@@ -41,42 +79,38 @@ def list_problems(
         queryset = queryset.filter(category__slug=category)
     if language:
         queryset = queryset.filter(language__name=language)
-    if search:
-        queryset = queryset.filter(
-            Q(title__icontains=search) |
-            Q(description__icontains=search)
-        )
     if tags:
         tag_list = [t.strip() for t in tags.split(",") if t.strip()]
         queryset = queryset.filter(tags__name__in=tag_list).distinct()
+    if search:
+        # Relevantlik bo'yicha tartiblanadi (cursor rejimida keyset tartibi ustun)
+        queryset = search_queryset(queryset, search)
 
-    # Foydalanuvchi bajargan masalalar
-    user_completed = set()
-    if request.user.is_authenticated:
-        from userstatus.models import UserProblemStatus
+    # ---------------- CURSOR PAGINATION ----------------
+    if pagination == "cursor" or cursor:
+        fields = CURSOR_ORDERINGS.get(ordering)
+        if fields is None:
+            raise HttpError(400, "ordering faqat 'id' yoki 'difficulty' bo'lishi mumkin")
 
-        user_completed = set(
-            UserProblemStatus.objects.filter(
-                user=request.user, is_completed=True
-            ).values_list("problem_id", flat=True)
-        )
+        items, next_cursor = keyset_paginate(queryset, fields, cursor, page_size)
+        user_completed = _completed_ids(request, [p.id for p in items])
+        response = {
+            "page_size": page_size,
+            "ordering": ordering,
+            "has_next": next_cursor is not None,
+            "next_cursor": next_cursor,
+            "results": [_problem_list_item(p, user_completed) for p in items],
+        }
+        if include_total:
+            response["total_items"] = queryset.count()
+        return response
 
     # ---------------- PAGINATION ----------------
     paginator = Paginator(queryset, page_size)
     page_obj = paginator.get_page(page)
 
-    results = [
-        {
-            "title": p.title,
-            "slug": p.slug,
-            "difficulty": p.difficulty,
-            "points": p.points,
-            "category": p.category.name if p.category else None,
-            "is_completed": p.id in user_completed,
-            "tags": [t.name for t in p.tags.all()],
-        }
-        for p in page_obj
-    ]
+    user_completed = _completed_ids(request, [p.id for p in page_obj])
+    results = [_problem_list_item(p, user_completed) for p in page_obj]
 
     return {
         "page": page_obj.number,
@@ -91,14 +125,12 @@ def list_problems(
     }
 
 # -------------------- Problem Detail --------------------
-@router.get("/{slug}", response=ProblemDetailSchema, auth=JWTBearer())
-def get_problem(request, slug: str):
+def _build_problem_detail(slug: str):
     """
-    Ma’lumotlarni to‘liq qaytaradi:
-    - Problem asosiy ma’lumotlari
-    - Tags, languages, examples, hints, challenges
-    - Video va ularning sifatlari (qualities)
-    - Start function har bir til bo‘yicha
+    Foydalanuvchiga bog'liq bo'lmagan payload ni DB dan yig'ish.
+
+    Returns:
+        (problem_id, payload)
     """
     problem = get_object_or_404(
         Problem.objects.select_related("category").prefetch_related(
@@ -115,15 +147,6 @@ def get_problem(request, slug: str):
         is_active=True,
     )
 
-    # Foydalanuvchi bajargan masalalar
-    user_completed = set()
-    if request.user.is_authenticated:
-        from userstatus.models import UserProblemStatus
-        user_completed = set(
-            UserProblemStatus.objects.filter(user=request.user, is_completed=True)
-            .values_list("problem_id", flat=True)
-        )
-
     # Questions and answers
     problem_questions = Question.objects.filter(problems=problem).prefetch_related("answers")
     question_data = [
@@ -145,6 +168,7 @@ def get_problem(request, slug: str):
                 "description": video.description,
                 "hls_url": video.get_hls_url(),
                 "thumbnail_url": video.get_thumbnail_url(),
+                "preview_vtt_url": video.get_preview_url(),
                 "duration": video.duration,
                 "views_count": video.views_count,
                 "likes_count": video.likes_count,
@@ -163,8 +187,7 @@ def get_problem(request, slug: str):
         for f in problem.functions.all()
     ]
 
-    # API Response
-    return {
+    return problem.id, {
         "title": problem.title,
         "slug": problem.slug,
         "description": problem.description,
@@ -182,5 +205,104 @@ def get_problem(request, slug: str):
         "challenges": [{"id": c.id, "text": c.text} for c in problem.challenges.all()],
         "videos": videos_data,
         "questions": question_data,
-        "is_completed": problem.id in user_completed
     }
+
+
+@router.get("/{slug}", response=ProblemDetailSchema, auth=JWTBearer())
+def get_problem(request, slug: str):
+    """
+    Ma’lumotlarni to‘liq qaytaradi:
+    - Problem asosiy ma’lumotlari
+    - Tags, languages, examples, hints, challenges
+    - Video va ularning sifatlari (qualities)
+    - Start function har bir til bo‘yicha
+
+    Umumiy qism Redis da versiya bilan keshlanadi (problems/cache.py),
+    faqat is_completed har so'rovda qo'shiladi.
+    """
+    entry, version = get_problem_detail(slug)
+    if entry is None:
+        problem_id, payload = _build_problem_detail(slug)
+        set_problem_detail(slug, version, problem_id, payload)
+    else:
+        problem_id, payload = entry
+
+    # Foydalanuvchi bajargan masalalar
+    user_completed = _completed_ids(request, [problem_id])
+
+    # API Response
+    return {**payload, "is_completed": problem_id in user_completed}
+
+
+@router.get(
+    "/videos/{video_id}/progress",
+    response=VideoProgressSchema,
+    auth=django_auth,
+    url_name="video_progress",
+)
+def video_progress(request, video_id: uuid.UUID):
+    """
+    Video processing holati (status, oxirgi tugagan bosqich, foiz) — faqat xodimlar uchun.
+    Redis keshdan o'qiladi — polling Video qatorini to'liq yuklamaydi.
+    """
+    if not request.user.is_staff:
+        raise HttpError(403, "Faqat xodimlar uchun")
+    data = get_progress(video_id)
+    if data is None:
+        raise HttpError(404, "Video topilmadi")
+    return data
+
+
+# -------------------- Video: brauzerdan to'g'ridan-to'g'ri MinIO ga upload --------------------
+def _staff_user_id(request):
+    if not request.user.is_staff:
+        raise HttpError(403, "Video yuklash faqat xodimlar uchun")
+    return request.user.pk
+
+
+@router.post("/videos/uploads", response=VideoUploadStartResponseSchema, auth=django_auth)
+def start_video_upload(request, data: VideoUploadStartSchema):
+    """
+    Multipart upload ni boshlash: har bo'lak uchun presigned PUT URL.
+    Klient bo'laklarni part_size bo'yicha kesib, parallel yuklaydi va
+    javobdagi ETag larni complete ga yuboradi.
+    """
+    user_id = _staff_user_id(request)
+    try:
+        return start_upload(user_id, data.filename, data.size, data.content_type)
+    except UploadError as e:
+        raise HttpError(400, str(e))
+
+
+@router.post("/videos/uploads/complete", response=VideoCreatedSchema, auth=django_auth)
+def complete_video_upload(request, data: VideoUploadCompleteSchema):
+    """Bo'laklarni yig'ib, Video yaratish — process_video post_save signalida navbatga qo'yiladi"""
+    user_id = _staff_user_id(request)
+    if data.encoder_profile and data.encoder_profile not in get_profiles():
+        raise HttpError(400, f"Noma'lum encoder profili: {data.encoder_profile}")
+    problem = get_object_or_404(Problem, slug=data.problem_slug) if data.problem_slug else None
+    try:
+        key, size = finish_upload(data.upload_id, user_id, [p.model_dump() for p in data.parts])
+    except UploadError as e:
+        raise HttpError(400, str(e))
+
+    video = Video.objects.create(
+        problem=problem,
+        title=data.title,
+        description=data.description,
+        encoder_profile=data.encoder_profile,
+        original_file=key,
+        file_size=size,
+    )
+    return {"id": str(video.id), "slug": video.slug, "status": video.status}
+
+
+@router.post("/videos/uploads/abort", auth=django_auth)
+def abort_video_upload(request, data: VideoUploadAbortSchema):
+    """Tugallanmagan upload ni bekor qilish — yuklangan bo'laklar MinIO dan o'chiriladi"""
+    user_id = _staff_user_id(request)
+    try:
+        cancel_upload(data.upload_id, user_id)
+    except UploadError as e:
+        raise HttpError(400, str(e))
+    return {"success": True}
@@ -0,0 +1,72 @@
+# ==================== problems/cache.py ====================
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+PROBLEM_DETAIL_TIMEOUT = getattr(settings, 'PROBLEM_DETAIL_CACHE_TIMEOUT', 60 * 60)
+
+
+def _version_key(slug: str) -> str:
+    return f"problem_detail:version:{slug}"
+
+
+def _payload_key(slug: str) -> str:
+    return f"problem_detail:payload:{slug}"
+
+
+def _initial_version() -> int:
+    # Versiya kaliti Redis dan o'chib ketsa ham eski payload bilan to'qnashmasligi uchun
+    return int(time.time() * 1000)
+
+
+def bump_problem_version(slug: str) -> None:
+    """Masala versiyasini oshirish — eski keshlangan payload yaroqsiz bo'ladi"""
+    if not slug:
+        return
+    key = _version_key(slug)
+    cache.add(key, _initial_version(), None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+def bump_problem_version_by_id(problem_id) -> None:
+    """FK orqali bog'langan modellar uchun (Examples, Hint, Video, ...)"""
+    if not problem_id:
+        return
+    from .models import Problem
+
+    slug = Problem.objects.filter(id=problem_id).values_list("slug", flat=True).first()
+    bump_problem_version(slug)
+
+
+def get_problem_detail(slug: str):
+    """
+    Foydalanuvchiga bog'liq bo'lmagan payload ni keshdan olish.
+    Versiya va payload bitta round trip (MGET) da o'qiladi.
+
+    Returns:
+        (entry, version) — entry = (problem_id, payload) yoki None.
+        version ni DB dan o'qishdan OLDIN olamiz, shunda o'qish paytida
+        versiya oshirilsa, eski payload yangi versiya bilan yozilmaydi.
+    """
+    version_key, payload_key = _version_key(slug), _payload_key(slug)
+    found = cache.get_many([version_key, payload_key])
+    version = found.get(version_key)
+    if version is None:
+        cache.add(version_key, _initial_version(), None)
+        return None, cache.get(version_key)
+
+    entry = found.get(payload_key)
+    if entry is None or entry["version"] != version:
+        return None, version
+    return (entry["problem_id"], entry["payload"]), version
+
+
+def set_problem_detail(slug: str, version: int, problem_id: int, payload: dict) -> None:
+    cache.set(
+        _payload_key(slug),
+        {"version": version, "problem_id": problem_id, "payload": payload},
+        PROBLEM_DETAIL_TIMEOUT,
+    )
@@ -0,0 +1,130 @@
+# ==================== problems/ladder.py ====================
+"""
+Bitrate ladder rejalashtiruvchi.
+
+settings.VIDEO_QUALITIES — oddiy (jonli tasvir) kontent uchun to'liq ladder.
+Har video uchun undan:
+  - manbadan katta (upscale) rung lar tashlanadi;
+  - bitrate lar murakkablik koeffitsientiga ko'paytiriladi — screencast
+    kabi statik kontentda ancha past bitrate yetarli;
+  - rung bitrate i manba bitrate idan oshmaydi, oldingi rung dan deyarli
+    farq qilmasa pastroq rung tashlanadi — eng yuqori (manba o'lchamidagi)
+    rung doim qoladi.
+"""
+import os
+import subprocess
+import tempfile
+
+from django.conf import settings
+
+DEFAULT_LADDER = [
+    {'name': '360p', 'width': 640, 'height': 360, 'bitrate': '800k'},
+    {'name': '720p', 'width': 1280, 'height': 720, 'bitrate': '2800k'},
+]
+VIDEO_QUALITIES = getattr(settings, 'VIDEO_QUALITIES', DEFAULT_LADDER)
+ADAPTIVE_LADDER = getattr(settings, 'VIDEO_ADAPTIVE_LADDER', True)
+COMPLEXITY_SAMPLES = getattr(settings, 'VIDEO_COMPLEXITY_SAMPLES', 3)
+COMPLEXITY_SAMPLE_SECONDS = 2
+
+# 360p, CRF 23 da oddiy kontentning taxminiy bitrate i (kbps) — koeffitsient 1.0
+REFERENCE_KBPS = 800
+MIN_COMPLEXITY = 0.3
+# 30 fps dan yuqori videolarga qo'shimcha bitrate
+HIGH_FPS_FACTOR = 1.5
+# Keyingi rung oldingisidan kamida shuncha marta ko'p bitrate olmasa, sifat qo'shmaydi
+MIN_RUNG_STEP = 1.3
+# Manba bitrate idan ortiq berish foydasiz (audio uchun biroz joy qoldiriladi)
+SOURCE_BITRATE_HEADROOM = 0.9
+
+
+def _kbps(bitrate):
+    return int(str(bitrate).replace('k', ''))
+
+
+def _even(value):
+    return max(2, int(round(value / 2.0)) * 2)
+
+
+def probe_complexity(input_path, duration, samples=None):
+    """
+    Bir nechta qisqa bo'lakni 360p, CRF 23 da tez kodlab, olingan bitrate ni
+    REFERENCE_KBPS ga nisbatini qaytaradi (MIN_COMPLEXITY..1.0).
+    Xato bo'lsa 1.0 — ya'ni to'liq ladder.
+    """
+    from .tasks import _input_args
+
+    samples = samples or COMPLEXITY_SAMPLES
+    if not duration or samples < 1:
+        return 1.0
+    sample = min(COMPLEXITY_SAMPLE_SECONDS, duration)
+    offsets = [duration * (i + 1) / (samples + 1) for i in range(samples)]
+
+    total_bytes = 0
+    total_seconds = 0.0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for i, offset in enumerate(offsets):
+            output = os.path.join(tmp_dir, f'sample_{i}.mkv')
+            start = max(0.0, min(offset, duration - sample))
+            cmd = [
+                'ffmpeg', '-y', '-ss', f'{start:.3f}', *_input_args(input_path), '-t', f'{sample:.3f}',
+                '-an', '-vf', 'scale=-2:360,format=yuv420p',
+                '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '23',
+                output,
+            ]
+            try:
+                subprocess.run(cmd, check=True, capture_output=True, text=True)
+            except subprocess.CalledProcessError as e:
+                print(f"Complexity probe xato: {e.stderr[-500:]}")
+                return 1.0
+            total_bytes += os.path.getsize(output)
+            total_seconds += sample
+
+    measured_kbps = total_bytes * 8 / 1000 / total_seconds
+    return max(MIN_COMPLEXITY, min(1.0, measured_kbps / REFERENCE_KBPS))
+
+
+def plan_ladder(width, height, fps=None, source_bitrate=None, complexity=1.0, ladder=None):
+    """
+    Manba o'lchamlari va murakkablik bo'yicha kodlanadigan rung lar ro'yxati.
+    source_bitrate — bps (ffprobe format.bit_rate), 0/None bo'lsa cheklanmaydi.
+    """
+    ladder = sorted(ladder or VIDEO_QUALITIES, key=lambda q: q['height'])
+    aspect = width / height if width and height else 16 / 9
+
+    factor = complexity
+    if fps and fps > 30:
+        factor *= HIGH_FPS_FACTOR
+    cap_kbps = int(source_bitrate * SOURCE_BITRATE_HEADROOM / 1000) if source_bitrate else None
+
+    rungs = [q for q in ladder if not height or q['height'] <= height]
+    if not rungs:
+        # Manba eng past rung dan ham kichik — o'z o'lchamida bitta rung
+        base = ladder[0]
+        scale = (height / base['height']) ** 2 if height else 1
+        rungs = [dict(base, name=f'{height}p', height=height, bitrate=f"{int(_kbps(base['bitrate']) * scale)}k")]
+
+    planned = []
+    for q in rungs:
+        kbps = max(100, int(_kbps(q['bitrate']) * factor))
+        if cap_kbps:
+            kbps = min(kbps, max(100, cap_kbps))
+        # Bitrate deyarli bir xil bo'lsa, kattaroq o'lcham afzal (screencast matni aniq
+        # qoladi) — shuning uchun yangi rung emas, undan oldingilar tashlanadi
+        while planned and kbps < _kbps(planned[-1]['bitrate']) * MIN_RUNG_STEP:
+            planned.pop()
+        planned.append({
+            'name': q['name'],
+            'width': _even(q['height'] * aspect),
+            'height': _even(q['height']),
+            'bitrate': f'{kbps}k',
+        })
+    return planned
+
+
+def plan_for_video(video, source_path=None):
+    """Video metadata (probe bosqichidan) va ixtiyoriy complexity probe bo'yicha ladder"""
+    if not ADAPTIVE_LADDER:
+        rungs = [q for q in VIDEO_QUALITIES if q['height'] <= (video.height or 0)]
+        return rungs or [sorted(VIDEO_QUALITIES, key=lambda q: q['height'])[0]]
+    complexity = probe_complexity(source_path, video.duration) if source_path else 1.0
+    return plan_ladder(video.width, video.height, video.fps, video.bitrate, complexity)
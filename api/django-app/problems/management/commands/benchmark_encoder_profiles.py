@@ -0,0 +1,96 @@
+import os
+import re
+import subprocess
+import tempfile
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from problems.profiles import get_profiles
+from problems.tasks import _encode_rendition
+
+
+class Command(BaseCommand):
+    help = "Encoder profillarini bitta video ustida solishtirish: tezlik (fps), hajm va VMAF/PSNR"
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="Manba video (lokal fayl yoki URL)")
+        parser.add_argument(
+            "--profiles",
+            default="",
+            help="Vergul bilan ajratilgan profil nomlari (default: barchasi)",
+        )
+        parser.add_argument("--width", type=int, default=1280)
+        parser.add_argument("--height", type=int, default=720)
+        parser.add_argument("--bitrate", default="2800k", help="Rung bitrate i (capped VBR uchun)")
+        parser.add_argument(
+            "--metric",
+            choices=["auto", "vmaf", "psnr"],
+            default="auto",
+            help="Sifat metrikasi: auto — libvmaf bo'lsa VMAF, aks holda PSNR",
+        )
+
+    def handle(self, *args: Any, **options: Any):
+        profiles = get_profiles()
+        names = [n.strip() for n in options["profiles"].split(",") if n.strip()] or list(profiles)
+        unknown = [n for n in names if n not in profiles]
+        if unknown:
+            raise CommandError(f"Noma'lum profil(lar): {', '.join(unknown)}. Mavjud: {', '.join(profiles)}")
+
+        metric = options["metric"]
+        if metric == "auto":
+            metric = "vmaf" if self._has_filter("libvmaf") else "psnr"
+
+        q = {
+            "name": "bench",
+            "width": options["width"],
+            "height": options["height"],
+            "bitrate": options["bitrate"],
+        }
+        self.stdout.write(f"{'profil':<12} {'vaqt, s':>8} {'fps':>8} {'hajm, MB':>9} {metric.upper():>8}")
+        for name in names:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                started = time.monotonic()
+                result = _encode_rendition(options["input"], tmp_dir, q, profile=profiles[name])
+                elapsed = time.monotonic() - started
+                if result is None:
+                    self.stdout.write(self.style.ERROR(f"{name:<12} kodlashda xato"))
+                    continue
+                playlist = os.path.join(tmp_dir, result["playlist"])
+                size = sum(
+                    os.path.getsize(os.path.join(root, f))
+                    for root, _, files in os.walk(tmp_dir)
+                    for f in files
+                    if not f.endswith(".m3u8")
+                )
+                frames, score = self._measure(playlist, options["input"], q, metric)
+            fps = frames / elapsed if elapsed else 0
+            score_display = f"{score:.2f}" if score is not None else "-"
+            self.stdout.write(
+                f"{name:<12} {elapsed:>8.1f} {fps:>8.1f} {size / 1024 / 1024:>9.2f} {score_display:>8}"
+            )
+
+    @staticmethod
+    def _has_filter(name):
+        output = subprocess.run(["ffmpeg", "-hide_banner", "-filters"], capture_output=True, text=True).stdout
+        return re.search(rf"\s{name}\s", output) is not None
+
+    @staticmethod
+    def _measure(distorted, reference, q, metric):
+        """Kodlangan natijani rendition o'lchamiga keltirilgan manba bilan solishtirish"""
+        scale = f"scale={q['width']}:{q['height']},format=yuv420p,setpts=PTS-STARTPTS"
+        compare = "libvmaf" if metric == "vmaf" else "psnr"
+        cmd = [
+            "ffmpeg", "-hide_banner", "-i", distorted, "-i", reference,
+            "-lavfi", f"[0:v]{scale}[dist];[1:v]{scale}[ref];[dist][ref]{compare}",
+            "-f", "null", "-",
+        ]
+        stderr = subprocess.run(cmd, capture_output=True, text=True).stderr
+        frames = re.findall(r"frame=\s*(\d+)", stderr)
+        if metric == "vmaf":
+            match = re.search(r"VMAF score[:=]\s*([\d.]+)", stderr)
+        else:
+            match = re.search(r"PSNR .*average:([\d.]+|inf)", stderr)
+        score = float(match.group(1)) if match and match.group(1) != "inf" else None
+        return int(frames[-1]) if frames else 0, score
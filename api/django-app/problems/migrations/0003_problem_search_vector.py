@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:00
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # GIN indeks va boshlang'ich to'ldirish faqat PostgreSQL da (SQLite da xotiradagi indeks)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS problems_problem_search_gin "
+        "ON problems_problem USING gin (search_vector)"
+    )
+    schema_editor.execute(
+        "UPDATE problems_problem SET search_vector = "
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS problems_problem_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0002_rename_code_executiontestcase_bootom_code_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0003_problem_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text="Asl faylning SHA-256 xeshi (bir xil videoni qayta kodlamaslik uchun)", max_length=64),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0004_video_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='processing_stage',
+            field=models.CharField(blank=True, choices=[('', 'Boshlanmagan'), ('probe', "Ma'lumot olindi"), ('thumbnail', 'Thumbnail tayyor'), ('renditions', 'Sifatlar tayyor'), ('finalize', 'Yakunlandi')], help_text='Oxirgi tugagan bosqich', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='has_audio',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0005_video_processing_stage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='preview_vtt',
+            field=models.CharField(blank=True, help_text='Scrubbing preview (sprite sheet) WebVTT fayl manzili', max_length=500),
+        ),
+    ]
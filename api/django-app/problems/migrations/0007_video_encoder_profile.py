@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0006_video_preview_vtt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='encoder_profile',
+            field=models.CharField(blank=True, help_text="Encoder profili (fast, balanced, quality, ...). Bo'sh — global default", max_length=50),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0007_video_encoder_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videoquality',
+            name='container',
+            field=models.CharField(choices=[('ts', 'MPEG-TS'), ('fmp4', 'fMP4 (CMAF)')], default='ts', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0008_videoquality_container'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='video',
+            name='processing_stage',
+            field=models.CharField(blank=True, choices=[('', 'Boshlanmagan'), ('probe', "Ma'lumot olindi"), ('thumbnail', 'Thumbnail tayyor'), ('dispatched', "Bo'laklar kodlashga yuborildi"), ('renditions', 'Sifatlar tayyor'), ('finalize', 'Yakunlandi')], help_text='Oxirgi tugagan bosqich', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0009_alter_video_processing_stage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='planned_qualities',
+            field=models.JSONField(blank=True, default=list, help_text='Probe bosqichida rejalashtirilgan ladder (retry da complexity probe qayta ishlamaydi)'),
+        ),
+    ]
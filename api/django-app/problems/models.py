@@ -1,6 +1,7 @@
 # ==================== problems/models.py ====================
 import uuid
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.urls import reverse
 from django.utils.text import slugify
@@ -99,6 +100,8 @@ class Problem(TimeMixsin):
     difficulty = models.PositiveIntegerField(choices=DIFFICULTY_CHOICES, default=1)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     points = models.PositiveIntegerField(default=10)
+    # Full-text qidiruv uchun (utils/search.py), GIN indeks migratsiyada
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ["id"]
@@ -211,6 +214,15 @@ class Video(models.Model):
         ('completed', 'Tayyor'),
         ('failed', 'Xatolik'),
     ]
+    # Processing bosqichlari tartibda; qayta urinishda birinchi tugamagan bosqichdan davom etiladi
+    STAGE_CHOICES = [
+        ('', 'Boshlanmagan'),
+        ('probe', "Ma'lumot olindi"),
+        ('thumbnail', 'Thumbnail tayyor'),
+        ('dispatched', "Bo'laklar kodlashga yuborildi"),
+        ('renditions', 'Sifatlar tayyor'),
+        ('finalize', 'Yakunlandi'),
+    ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)  # ← QO'SHILDI
     problem = models.ForeignKey(
@@ -245,6 +257,12 @@ class Video(models.Model):
     bitrate = models.IntegerField(null=True, blank=True)
     codec = models.CharField(max_length=50, blank=True)
     file_size = models.BigIntegerField(null=True, blank=True, help_text="Baytlarda")
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text="Asl faylning SHA-256 xeshi (bir xil videoni qayta kodlamaslik uchun)"
+    )
     
     # Statistics  ← QO'SHILDI
     views_count = models.PositiveIntegerField(default=0)
@@ -264,10 +282,32 @@ class Video(models.Model):
         blank=True,
         help_text="master.m3u8 fayl manzili"
     )
+    preview_vtt = models.CharField(
+        max_length=500,
+        blank=True,
+        help_text="Scrubbing preview (sprite sheet) WebVTT fayl manzili"
+    )
     
     # Processing
     processing_progress = models.IntegerField(default=0)
     processing_error = models.TextField(blank=True)
+    processing_stage = models.CharField(
+        max_length=20,
+        choices=STAGE_CHOICES,
+        blank=True,
+        help_text="Oxirgi tugagan bosqich"
+    )
+    has_audio = models.BooleanField(default=True)
+    encoder_profile = models.CharField(
+        max_length=50,
+        blank=True,
+        help_text="Encoder profili (fast, balanced, quality, ...). Bo'sh — global default"
+    )
+    planned_qualities = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Probe bosqichida rejalashtirilgan ladder (retry da complexity probe qayta ishlamaydi)"
+    )
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -300,12 +340,23 @@ class Video(models.Model):
             return f"{settings.AWS_S3_ENDPOINT_URL}/{settings.AWS_STORAGE_BUCKET_NAME}/{self.hls_playlist}"
         return None
 
+    def get_preview_url(self):
+        """Sprite sheet WebVTT URL"""
+        if self.preview_vtt:
+            return f"{settings.AWS_S3_ENDPOINT_URL}/{settings.AWS_STORAGE_BUCKET_NAME}/{self.preview_vtt}"
+        return None
+
     def get_thumbnail_url(self):
         """Thumbnail URL"""
         if self.thumbnail:
             return self.thumbnail.url
         return None
 
+    def stage_done(self, stage):
+        """`stage` bosqichi (yoki undan keyingisi) allaqachon tugaganmi"""
+        stages = [choice[0] for choice in self.STAGE_CHOICES]
+        return stages.index(self.processing_stage or '') >= stages.index(stage)
+
     def increment_views(self):
         """Ko'rishlar sonini oshirish"""
         self.views_count += 1
@@ -313,6 +364,11 @@ class Video(models.Model):
 
 
 class VideoQuality(models.Model):
+    CONTAINER_CHOICES = [
+        ('ts', 'MPEG-TS'),
+        ('fmp4', 'fMP4 (CMAF)'),
+    ]
+
     video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='qualities')
     quality = models.CharField(max_length=20, help_text='Masalan: 360p, 720p, 1080p')
     width = models.IntegerField()
@@ -321,6 +377,7 @@ class VideoQuality(models.Model):
     file_size = models.BigIntegerField(default=0, help_text='Baytlarda')
     is_ready = models.BooleanField(default=False)
     bitrate = models.CharField(max_length=20, default='0k', help_text='Masalan: 800k, 2800k')
+    container = models.CharField(max_length=10, choices=CONTAINER_CHOICES, default='ts')
     
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -0,0 +1,129 @@
+# ==================== problems/profiles.py ====================
+"""
+Encoder profillari: ffmpeg argumentlari (kodek, preset, rate control,
+segment uzunligi, playlist turi) bir joyda.
+
+Profil global (settings.VIDEO_ENCODER_PROFILE) yoki har video uchun
+(Video.encoder_profile) tanlanadi. Qo'shimcha/o'zgartirilgan profillar
+settings.VIDEO_ENCODER_PROFILES orqali beriladi:
+
+    VIDEO_ENCODER_PROFILES = {
+        'nvenc': {'codec': 'h264_nvenc', 'preset': 'p4', 'rate_control': 'crf', 'crf': 24},
+    }
+
+Qaysi profil yaxshiroq ekanini `python manage.py benchmark_encoder_profiles` bilan o'lchang.
+"""
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+# 'ts' — MPEG-TS (default), 'fmp4' — CMAF segmentlar (.m4s + #EXT-X-MAP init)
+HLS_CONTAINER = getattr(settings, 'VIDEO_HLS_CONTAINER', 'ts')
+SEGMENT_EXTENSIONS = {'ts': 'ts', 'fmp4': 'm4s'}
+
+
+@dataclass(frozen=True)
+class EncoderProfile:
+    name: str
+    codec: str = 'libx264'
+    preset: str = 'veryfast'
+    h264_profile: Optional[str] = 'main'
+    # 'vbr' — rung bitrate i bo'yicha capped VBR; 'crf' — sifat bo'yicha, maxrate bilan cheklangan
+    rate_control: str = 'vbr'
+    crf: int = 23
+    maxrate_factor: float = 1.0
+    bufsize_factor: float = 2.0
+    # 'vod' — to'liq playlist (#EXT-X-ENDLIST); 'event' — yozilish davomida o'sib boradigan
+    playlist_type: str = 'vod'
+    segment_duration: int = 2
+    container: str = HLS_CONTAINER
+
+    @property
+    def segment_extension(self) -> str:
+        return SEGMENT_EXTENSIONS[self.container]
+
+    def segment_pattern(self, prefix: str = 'segment') -> str:
+        return f'{prefix}_%03d.{self.segment_extension}'
+
+    def _quality_option(self) -> str:
+        # libx264/libx265 da -crf, apparat encoderlarda (nvenc, qsv, ...) -cq
+        return '-crf' if self.codec in ('libx264', 'libx265') else '-cq'
+
+    def codec_args(self) -> List[str]:
+        """Barcha video oqimlari uchun umumiy argumentlar"""
+        args = ['-c:v', self.codec, '-preset', self.preset]
+        if self.h264_profile:
+            args += ['-profile:v', self.h264_profile]
+        return args
+
+    def rate_args(self, bitrate: str, index: Optional[int] = None) -> List[str]:
+        """
+        Bitta rendition uchun rate control. `index` berilsa, stream specifier
+        qo'shiladi (single pass da har oqim alohida).
+        """
+        spec = f':v:{index}' if index is not None else ':v'
+        kbps = int(str(bitrate).replace('k', ''))
+        if self.rate_control == 'crf':
+            args = [f'{self._quality_option()}{spec}', str(self.crf)]
+        else:
+            args = [f'-b{spec}', bitrate]
+        return args + [
+            f'-maxrate{spec}', f'{int(kbps * self.maxrate_factor)}k',
+            f'-bufsize{spec}', f'{int(kbps * self.bufsize_factor)}k',
+        ]
+
+    def keyframe_args(self) -> List[str]:
+        """Keyframe lar segment chegaralarida — barcha renditionlarda bir xil joyda"""
+        return [
+            '-force_key_frames', f'expr:gte(t,n_forced*{self.segment_duration})',
+            '-sc_threshold', '0',
+        ]
+
+    def hls_args(self) -> List[str]:
+        flags = 'independent_segments+temp_file'
+        if self.playlist_type == 'event':
+            flags += '+program_date_time'
+        args = [
+            '-f', 'hls',
+            '-hls_time', str(self.segment_duration),
+            '-hls_playlist_type', self.playlist_type,
+            '-hls_list_size', '0',
+            '-hls_flags', flags,
+        ]
+        if self.container == 'fmp4':
+            # Init segment (moov) playlist yonida, har playlistda #EXT-X-MAP bilan.
+            # TS ga nisbatan ~10% kam overhead, segmentlarni DASH bilan ham ishlatish mumkin
+            args += ['-hls_segment_type', 'fmp4', '-hls_fmp4_init_filename', 'init.mp4']
+        return args
+
+
+BUILTIN_PROFILES: Dict[str, EncoderProfile] = {
+    profile.name: profile
+    for profile in (
+        EncoderProfile('fast', preset='superfast'),
+        EncoderProfile('balanced'),
+        EncoderProfile('quality', preset='medium', rate_control='crf', crf=21, maxrate_factor=1.5, segment_duration=4),
+        # Statik kontent (screencast) uchun: CRF yetarli bitrate ni o'zi tanlaydi
+        EncoderProfile('screencast', preset='faster', rate_control='crf', crf=26, maxrate_factor=1.0),
+        EncoderProfile('event', playlist_type='event'),
+        # fMP4/CMAF — TS dan ~10% kichik, segmentlar DASH bilan umumiy; HLS 7 player talab qiladi
+        EncoderProfile('cmaf', container='fmp4'),
+    )
+}
+
+DEFAULT_PROFILE = getattr(settings, 'VIDEO_ENCODER_PROFILE', 'balanced')
+
+
+def get_profiles() -> Dict[str, EncoderProfile]:
+    profiles = dict(BUILTIN_PROFILES)
+    for name, options in getattr(settings, 'VIDEO_ENCODER_PROFILES', {}).items():
+        base = profiles.get(name, EncoderProfile(name))
+        profiles[name] = replace(base, name=name, **options)
+    return profiles
+
+
+def get_profile(name: Optional[str] = None) -> EncoderProfile:
+    """Nomi bo'yicha profil; bo'sh yoki noma'lum bo'lsa — global default"""
+    profiles = get_profiles()
+    return profiles.get(name or DEFAULT_PROFILE) or profiles.get(DEFAULT_PROFILE) or BUILTIN_PROFILES['balanced']
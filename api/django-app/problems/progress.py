@@ -0,0 +1,122 @@
+# ==================== problems/progress.py ====================
+"""
+Video processing progressi Redis da (kesh kaliti) saqlanadi.
+
+Kodlash davomida ffmpeg `-progress` chiqishi ProgressReporter ga uzatiladi:
+u foizni throttled holda keshga yozadi, DB ga esa kamdan-kam va faqat
+processing_progress ustunini (queryset.update — post_save signallarsiz,
+problem detail keshi buzilmaydi). Polling endpoint va admin avval keshni o'qiydi.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+PROGRESS_TIMEOUT = getattr(settings, 'VIDEO_PROGRESS_CACHE_TIMEOUT', 60 * 60)
+# Keshga yozish oralig'i (soniya)
+PROGRESS_INTERVAL = getattr(settings, 'VIDEO_PROGRESS_INTERVAL', 2)
+# DB dagi processing_progress ni yangilash oralig'i (soniya)
+PROGRESS_DB_INTERVAL = getattr(settings, 'VIDEO_PROGRESS_DB_INTERVAL', 15)
+
+
+def _progress_key(video_id) -> str:
+    return f"video_progress:{video_id}"
+
+
+def publish_progress(video_id, status, stage, progress) -> None:
+    cache.set(
+        _progress_key(video_id),
+        {"status": status, "stage": stage or None, "progress": progress},
+        PROGRESS_TIMEOUT,
+    )
+
+
+def publish_video(video) -> None:
+    """Video obyektining joriy holatini keshga yozish (post_save dan)"""
+    publish_progress(video.id, video.status, video.processing_stage, video.processing_progress)
+
+
+def clear_progress(video_id) -> None:
+    cache.delete(_progress_key(video_id))
+
+
+def get_progress(video_id):
+    """
+    Kesh, bo'lmasa DB dan faqat uchta ustun. Video topilmasa None.
+    DB natijasi keshlanmaydi — bo'laklab kodlashda progress DB da F() bilan oshiriladi.
+    """
+    data = cache.get(_progress_key(video_id))
+    if data is not None:
+        return data
+    from .models import Video
+
+    row = (
+        Video.objects.filter(id=video_id)
+        .values("status", "processing_stage", "processing_progress")
+        .first()
+    )
+    if row is None:
+        return None
+    return {
+        "status": row["status"],
+        "stage": row["processing_stage"] or None,
+        "progress": row["processing_progress"],
+    }
+
+
+def get_cached_progress_many(video_ids) -> dict:
+    """Bir nechta video uchun faqat kesh (bitta MGET). {video_id: data}, keshda yo'qlari tushib qoladi"""
+    keys = {_progress_key(video_id): video_id for video_id in video_ids}
+    if not keys:
+        return {}
+    return {keys[key]: data for key, data in cache.get_many(list(keys)).items()}
+
+
+class ProgressReporter:
+    """
+    ffmpeg dan kelgan kodlangan soniyalarni [start, end] oralig'idagi foizga aylantiradi.
+    Bir vaqtda bir nechta ffmpeg (parallel renditionlar) bo'lsa, har biri o'z `part`
+    i bilan yozadi va o'rtachasi olinadi.
+
+        reporter = ProgressReporter(video.id, video.duration, start=10, end=90, parts=2)
+        run_ffmpeg(cmd, on_progress=reporter.callback('360p'))
+    """
+
+    def __init__(self, video_id, duration, start=0, end=100, parts=1, stage=None):
+        self.video_id = video_id
+        self.duration = duration or 0
+        self.start = start
+        self.end = end
+        self.parts = max(1, parts)
+        self.stage = stage
+        self._done = {}
+        self._progress = start
+        self._published_at = 0.0
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def callback(self, part=0, weight=1):
+        """weight — bitta ffmpeg nechta qismni yozayotgani (single pass da barcha sifatlar)"""
+        return lambda seconds: self.update(seconds, part, weight)
+
+    def update(self, seconds, part=0, weight=1):
+        if not self.duration:
+            return
+        with self._lock:
+            self._done[part] = min(seconds, self.duration) * weight
+            fraction = sum(self._done.values()) / (self.duration * self.parts)
+            progress = min(self.end, int(self.start + (self.end - self.start) * fraction))
+            now = time.monotonic()
+            if progress <= self._progress or now - self._published_at < PROGRESS_INTERVAL:
+                return
+            self._progress, self._published_at = progress, now
+            save = now - self._saved_at >= PROGRESS_DB_INTERVAL
+            if save:
+                self._saved_at = now
+
+        publish_progress(self.video_id, 'processing', self.stage, progress)
+        if save:
+            from .models import Video
+
+            Video.objects.filter(id=self.video_id).update(processing_progress=progress)
@@ -43,6 +43,7 @@ class VideoSchema(BaseModel):
     description: Optional[str]
     hls_url: Optional[str]
     thumbnail_url: Optional[str]
+    preview_vtt_url: Optional[str] = None
     status: str
     duration: int
     views_count: int
@@ -50,6 +51,54 @@ class VideoSchema(BaseModel):
     dislikes_count: int
 
 
+class VideoProgressSchema(BaseModel):
+    status: str
+    stage: Optional[str] = None
+    progress: int
+
+
+class VideoUploadStartSchema(BaseModel):
+    filename: str
+    size: int
+    content_type: Optional[str] = None
+
+
+class VideoUploadPartUrlSchema(BaseModel):
+    part_number: int
+    url: str
+
+
+class VideoUploadStartResponseSchema(BaseModel):
+    upload_id: str
+    key: str
+    part_size: int
+    parts: List[VideoUploadPartUrlSchema]
+
+
+class VideoUploadPartSchema(BaseModel):
+    part_number: int
+    etag: str
+
+
+class VideoUploadCompleteSchema(BaseModel):
+    upload_id: str
+    parts: List[VideoUploadPartSchema]
+    title: str
+    description: str = ""
+    problem_slug: Optional[str] = None
+    encoder_profile: str = ""
+
+
+class VideoUploadAbortSchema(BaseModel):
+    upload_id: str
+
+
+class VideoCreatedSchema(BaseModel):
+    id: str
+    slug: str
+    status: str
+
+
 # -------------------- Question / Answer Schema --------------------
 class AnswerSchema(BaseModel):
     id: int
@@ -1,10 +1,127 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_save, m2m_changed
 from django.dispatch import receiver
 from django.db import transaction
-from .models import Video
-from .tasks import process_video
+from .models import Problem, Examples, Hint, Challenge, Function, Video, VideoQuality
+from .tasks import enqueue_video_processing
+from .cache import bump_problem_version, bump_problem_version_by_id
+from .progress import clear_progress, publish_video
+from quizs.models import Question, Answer
+from utils.search import update_search_index, remove_from_search_index
 
 @receiver(post_save, sender=Video)
 def video_post_save_handler(sender, instance, created, **kwargs):
     if created and instance.original_file:
-        transaction.on_commit(lambda: process_video.delay(instance.id))
+        transaction.on_commit(lambda: enqueue_video_processing(instance))
+
+
+@receiver(post_save, sender=Video)
+def video_progress_handler(sender, instance, **kwargs):
+    """Status/bosqich o'zgarishi polling endpoint keshiga ham yoziladi"""
+    publish_video(instance)
+
+
+@receiver(post_delete, sender=Video)
+def video_progress_delete_handler(sender, instance, **kwargs):
+    clear_progress(instance.pk)
+
+
+# -------------------- Problem detail kesh versiyasi --------------------
+@receiver(pre_save, sender=Problem)
+def problem_slug_changed_handler(sender, instance, **kwargs):
+    """Slug o'zgarsa, eski slug bo'yicha keshlangan payload ham yaroqsiz bo'lsin"""
+    if not instance.pk:
+        return
+    old_slug = Problem.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+    if old_slug and old_slug != instance.slug:
+        bump_problem_version(old_slug)
+
+
+@receiver(post_save, sender=Problem)
+@receiver(post_delete, sender=Problem)
+def problem_changed_handler(sender, instance, **kwargs):
+    bump_problem_version(instance.slug)
+
+
+@receiver(m2m_changed, sender=Problem.tags.through)
+def problem_tags_changed_handler(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and isinstance(instance, Problem):
+        bump_problem_version(instance.slug)
+
+
+# Problem detail payload ida ishlatiladigan Video ustunlari. Faqat processing
+# holati/progressi o'zgargan saqlashlar keshni buzmasligi kerak
+VIDEO_DETAIL_FIELDS = frozenset({
+    "problem", "problem_id", "title", "slug", "description", "hls_playlist", "thumbnail",
+    "preview_vtt", "duration", "views_count", "likes_count", "dislikes_count",
+})
+
+
+def _touches_fields(update_fields, fields) -> bool:
+    return update_fields is None or not fields.isdisjoint(update_fields)
+
+
+@receiver(pre_save, sender=Examples)
+@receiver(pre_save, sender=Hint)
+@receiver(pre_save, sender=Challenge)
+@receiver(pre_save, sender=Function)
+@receiver(pre_save, sender=Video)
+@receiver(pre_save, sender=Question)
+def problem_child_moved_handler(sender, instance, update_fields=None, **kwargs):
+    """Boshqa masalaga ko'chirilsa, eski masala payload i ham yaroqsiz bo'lsin"""
+    field = "problems" if sender is Question else "problem"
+    attname = f"{field}_id"
+    if instance._state.adding or not _touches_fields(update_fields, {field, attname}):
+        return
+    old_id = sender.objects.filter(pk=instance.pk).values_list(attname, flat=True).first()
+    if old_id and old_id != getattr(instance, attname):
+        bump_problem_version_by_id(old_id)
+
+
+@receiver(post_save, sender=Examples)
+@receiver(post_delete, sender=Examples)
+@receiver(post_save, sender=Hint)
+@receiver(post_delete, sender=Hint)
+@receiver(post_save, sender=Challenge)
+@receiver(post_delete, sender=Challenge)
+@receiver(post_save, sender=Function)
+@receiver(post_delete, sender=Function)
+@receiver(post_delete, sender=Video)
+def problem_child_changed_handler(sender, instance, **kwargs):
+    bump_problem_version_by_id(instance.problem_id)
+
+
+@receiver(post_save, sender=Video)
+def video_changed_handler(sender, instance, update_fields=None, **kwargs):
+    if _touches_fields(update_fields, VIDEO_DETAIL_FIELDS):
+        bump_problem_version_by_id(instance.problem_id)
+
+
+@receiver(post_save, sender=VideoQuality)
+@receiver(post_delete, sender=VideoQuality)
+def video_quality_changed_handler(sender, instance, **kwargs):
+    problem_id = Video.objects.filter(pk=instance.video_id).values_list("problem_id", flat=True).first()
+    bump_problem_version_by_id(problem_id)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed_handler(sender, instance, **kwargs):
+    bump_problem_version_by_id(instance.problems_id)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def answer_changed_handler(sender, instance, **kwargs):
+    problem_id = Question.objects.filter(pk=instance.question_id).values_list("problems_id", flat=True).first()
+    bump_problem_version_by_id(problem_id)
+
+
+# -------------------- Full-text qidiruv indeksi --------------------
+@receiver(post_save, sender=Problem)
+def problem_search_index_handler(sender, instance, update_fields=None, **kwargs):
+    update_search_index(instance, update_fields)
+
+
+@receiver(post_delete, sender=Problem)
+def problem_search_index_delete_handler(sender, instance, **kwargs):
+    remove_from_search_index(instance)
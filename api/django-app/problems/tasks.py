@@ -1,29 +1,164 @@
+import hashlib
+import logging
+import math
 import os
+import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import ffmpeg
-from celery import shared_task
+from PIL import Image, ImageStat
+from celery import chord, shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.db.models import F
+from django.db.models.functions import Least
 from django.utils import timezone
 from django.core.files.base import ContentFile
-import boto3
-from botocore.exceptions import ClientError
 import tempfile
+from contextlib import contextmanager
 from django.conf import settings
+from utils.s3 import SegmentUploader, get_s3_client, upload_directory, upload_file
 from .models import Video, VideoQuality
+from .ladder import plan_for_video
+from .profiles import get_profile
+from .progress import ProgressReporter, clear_progress
 
-VIDEO_QUALITIES = [
-    {'name': '360p', 'width': 640, 'height': 360, 'bitrate': '800k'},
-    {'name': '720p', 'width': 1280, 'height': 720, 'bitrate': '2800k'},
+logger = logging.getLogger(__name__)
+
+# 'single_pass' — bitta decode, split + var_stream_map bilan barcha sifatlar birdaniga
+# 'parallel'    — har sifat alohida ffmpeg, lekin parallel (ENCODE_WORKERS ta)
+# 'serial'      — eski usul, sifatlar ketma-ket
+VIDEO_ENCODE_MODE = getattr(settings, 'VIDEO_ENCODE_MODE', 'single_pass')
+ENCODE_WORKERS = getattr(settings, 'VIDEO_ENCODE_WORKERS', None) or os.cpu_count() or 1
+# Uzun videolar bo'laklarga bo'linib, chord orqali bir nechta worker da kodlanadi
+CHUNKED_MIN_DURATION = getattr(settings, 'VIDEO_CHUNKED_MIN_DURATION', 600)
+CHUNK_DURATION = getattr(settings, 'VIDEO_CHUNK_DURATION', 120)
+# 'download' — manba temp faylga to'liq yuklanadi
+# 'stream'   — ffprobe/ffmpeg presigned URL dan o'qiydi (range so'rovlar bilan)
+# Scrubbing preview: har PREVIEW_INTERVAL soniyada bitta tile, sheet da 10x10 tile
+PREVIEW_INTERVAL = getattr(settings, 'VIDEO_PREVIEW_INTERVAL', 10)
+PREVIEW_TILE_WIDTH = 160
+PREVIEW_GRID = (10, 10)
+POSTER_CANDIDATES = 6
+PREVIEW_KEYFRAMES_ONLY_AFTER = 5 * 60
+# Bir xil manba (content_hash) oldin kodlangan bo'lsa, renditionlari qayta ishlatiladi
+DEDUPLICATE = getattr(settings, 'VIDEO_DEDUPLICATE', True)
+HASH_CHUNK_SIZE = 1024 * 1024
+# Qisqa videolar uzun ma'ruzalardan oldin olinadi (Redis: 0 — eng yuqori priority)
+VIDEO_PRIORITY_STEPS = [
+    # (davomiylik soniyada, fayl hajmi baytda, priority)
+    (5 * 60, 200 * 1024 * 1024, 1),
+    (30 * 60, 1024 * 1024 * 1024, 4),
 ]
+VIDEO_PRIORITY_LONG = 7
+VIDEO_PRIORITY_UNKNOWN = 5
+VIDEO_MAX_RETRIES = getattr(settings, 'VIDEO_MAX_RETRIES', 3)
+VIDEO_RETRY_DELAY = getattr(settings, 'VIDEO_RETRY_DELAY', 60)
+# Segmentlar kodlash davomida yuklab boriladi (utils.s3.SegmentUploader)
+PIPELINED_UPLOAD = getattr(settings, 'VIDEO_PIPELINED_UPLOAD', True)
+VIDEO_SOURCE_MODE = getattr(settings, 'VIDEO_SOURCE_MODE', 'stream')
+SOURCE_URL_EXPIRES = getattr(settings, 'VIDEO_SOURCE_URL_EXPIRES', 6 * 60 * 60)
 
-def get_s3_client():
-    """MinIO/S3 client"""
-    return boto3.client(
-        's3',
-        endpoint_url=getattr(settings, 'AWS_S3_ENDPOINT_URL', 'http://localhost:9000'),
-        aws_access_key_id=getattr(settings, 'AWS_ACCESS_KEY_ID', 'minioadmin'),
-        aws_secret_access_key=getattr(settings, 'AWS_SECRET_ACCESS_KEY', 'minioadmin123'),
-        region_name=getattr(settings, 'AWS_S3_REGION_NAME', 'us-east-1')
-    )
+
+def video_task_priority(duration=None, file_size=None):
+    """
+    'video' navbatidagi priority. Davomiylik hali noma'lum bo'lsa (upload
+    paytida) fayl hajmi bo'yicha taxmin qilinadi.
+    """
+    if not duration and file_size is None:
+        return VIDEO_PRIORITY_UNKNOWN
+    for max_duration, max_size, priority in VIDEO_PRIORITY_STEPS:
+        if (duration and duration <= max_duration) or (not duration and file_size <= max_size):
+            return priority
+    return VIDEO_PRIORITY_LONG
+
+
+def enqueue_video_processing(video):
+    """process_video ni fayl hajmiga mos priority bilan navbatga qo'yish"""
+    file_size = video.file_size
+    if file_size is None:
+        try:
+            file_size = video.original_file.size
+        except Exception:
+            file_size = None
+    return process_video.apply_async((video.id,), priority=video_task_priority(file_size=file_size))
+
+
+def _is_url(path):
+    return str(path).startswith(('http://', 'https://'))
+
+
+def _input_args(input_path):
+    """ffmpeg -i argumentlari. URL bo'lsa uzilishda qayta ulanadi"""
+    if _is_url(input_path):
+        return ['-reconnect', '1', '-reconnect_on_network_error', '1', '-reconnect_delay_max', '5', '-i', input_path]
+    return ['-i', input_path]
+
+
+def _report_progress(on_progress, seconds):
+    """Progress faqat ko'rsatish uchun — kesh/DB xatosi kodlashni yiqitmasin"""
+    try:
+        on_progress(seconds)
+    except SoftTimeLimitExceeded:
+        # Signal callback ichida kelishi mumkin — bu kodlashni to'xtatishi kerak
+        raise
+    except Exception:
+        logger.exception("Video progress ni yozib bo'lmadi")
+
+
+def run_ffmpeg(cmd, on_progress=None):
+    """
+    ffmpeg ni ishga tushirish. on_progress berilsa, `-progress pipe:1` chiqishidan
+    kodlangan soniyalar (out_time_us) callback ga uzatiladi. Xatoda
+    subprocess.run(check=True) kabi CalledProcessError (stderr bilan) ko'tariladi.
+    """
+    if on_progress is None:
+        return subprocess.run(cmd, check=True, capture_output=True, text=True)
+
+    cmd = [cmd[0], '-progress', 'pipe:1', '-nostats', *cmd[1:]]
+    # stderr faylga — pipe to'lib, ffmpeg bloklanib qolmasin
+    with tempfile.TemporaryFile(mode='w+') as stderr:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr, text=True)
+        try:
+            for line in process.stdout:
+                key, _, value = line.strip().partition('=')
+                if key == 'out_time_us' and value.isdigit():
+                    _report_progress(on_progress, int(value) / 1_000_000)
+            returncode = process.wait()
+        except BaseException:
+            # SoftTimeLimitExceeded va h.k.: ffmpeg yetim qolib, retry bilan parallel kodlamasin
+            process.kill()
+            process.wait()
+            raise
+        stderr.seek(0)
+        output = stderr.read()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd, stderr=output)
+    return subprocess.CompletedProcess(cmd, returncode, stderr=output)
+
+
+@contextmanager
+def open_video_source(file_key, mode=None, bucket='media'):
+    """
+    ffmpeg uchun manba yo'li. 'stream' rejimida presigned GET URL qaytadi:
+    ffprobe faqat kerakli qismlarni (masalan, oxiridagi moov) range bilan o'qiydi,
+    kodlash esa birinchi baytlardan boshlanadi va diskka nusxa yozilmaydi.
+    """
+    mode = mode or VIDEO_SOURCE_MODE
+    s3_client = get_s3_client()
+    if mode == 'stream':
+        yield s3_client.generate_presigned_url(
+            'get_object', Params={'Bucket': bucket, 'Key': file_key}, ExpiresIn=SOURCE_URL_EXPIRES
+        )
+        return
+
+    suffix = os.path.splitext(file_key)[1] or '.mp4'
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        s3_client.download_fileobj(bucket, file_key, tmp_file)
+        tmp_file_path = tmp_file.name
+    try:
+        yield tmp_file_path
+    finally:
+        os.unlink(tmp_file_path)
 
 def get_video_info(video_path):
     """Video ma'lumotlarini olish"""
@@ -32,6 +167,7 @@ def get_video_info(video_path):
         video_stream = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
         if not video_stream:
             raise ValueError("Video stream topilmadi")
+        has_audio = any(s['codec_type'] == 'audio' for s in probe['streams'])
         return {
             'duration': float(probe['format']['duration']),
             'width': int(video_stream['width']),
@@ -39,7 +175,8 @@ def get_video_info(video_path):
             'fps': eval(video_stream['r_frame_rate']),
             'bitrate': int(probe['format'].get('bit_rate', 0)),
             'codec': video_stream['codec_name'],
-            'file_size': int(probe['format']['size'])
+            'file_size': int(probe['format'].get('size', 0)),
+            'has_audio': has_audio,
         }
     except Exception as e:
         raise Exception(f"Video info olishda xato: {str(e)}")
@@ -48,7 +185,7 @@ def generate_thumbnail(video_path, output_path, timestamp='00:00:01'):
     """Video'dan thumbnail yaratish"""
     try:
         (
-            ffmpeg.input(video_path, ss=timestamp)
+            ffmpeg.input(video_path, ss=timestamp, **({'reconnect': 1} if _is_url(video_path) else {}))
                   .filter('scale', 640, -1)
                   .output(output_path, vframes=1, format='image2', vcodec='mjpeg')
                   .overwrite_output()
@@ -59,80 +196,554 @@ def generate_thumbnail(video_path, output_path, timestamp='00:00:01'):
         print(f"Thumbnail xato: {e.stderr.decode()}")
         return False
 
-def convert_to_hls(input_path, output_dir, video_id, qualities):
-    """Video'ni HLS formatiga o'tkazish - multi-quality"""
+def _vtt_time(seconds):
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{secs:06.3f}"
+
+
+def frame_variance(image_path):
+    """Kulrang tasvir piksellari dispersiyasi — qora/bir xil kadrlarda ~0"""
+    with Image.open(image_path) as img:
+        return ImageStat.Stat(img.convert('L')).var[0]
+
+
+def generate_previews(input_path, output_dir, duration, width=None, height=None):
+    """
+    Bitta decode dan: scrubbing uchun sprite sheet lar (+ WebVTT indeks) va
+    bir nechta poster nomzodlari. Poster — dispersiyasi eng katta nomzod,
+    shuning uchun qora intro kadr tanlanmaydi.
+
+    Qaytadi: {'poster': path|None, 'vtt': path|None, 'files': [...]}
+    """
     os.makedirs(output_dir, exist_ok=True)
-    master_playlist_path = os.path.join(output_dir, 'master.m3u8')
-    master_content = "#EXTM3U\n#EXT-X-VERSION:3\n\n"
-    processed_qualities = []
+    duration = max(float(duration or 0), 1.0)
+    tile_w = PREVIEW_TILE_WIDTH
+    tile_h = max(2, int(round(tile_w * height / width / 2)) * 2) if width and height else tile_w * 9 // 16
+    cols, rows = PREVIEW_GRID
+    interval = PREVIEW_INTERVAL
 
-    for q in qualities:
-        quality_dir = os.path.join(output_dir, q['name'])
-        os.makedirs(quality_dir, exist_ok=True)
-        playlist_file = os.path.join(quality_dir, f"{q['name']}.m3u8")
-        segment_pattern = os.path.join(quality_dir, f"{q['name']}_%03d.ts")
-
-        cmd = [
-            'ffmpeg', '-i', input_path,
-            '-vf', f"scale={q['width']}:{q['height']}",
-            '-c:v', 'libx264', '-preset', 'veryfast', '-profile:v', 'main',
-            '-b:v', q['bitrate'], '-maxrate', q['bitrate'],
-            '-bufsize', f"{int(q['bitrate'].replace('k',''))*2}k",
-            '-c:a', 'aac', '-b:a', '128k', '-ac', '2', '-ar', '48000',
-            '-hls_time', '2', '-hls_init_time', '2', '-hls_allow_cache', '0',
-            '-hls_playlist_type', 'event',
-            '-hls_flags', 'independent_segments+program_date_time+delete_segments',
-            '-hls_segment_filename', segment_pattern,
-            '-hls_list_size', '5',
-            playlist_file
-        ]
+    filters = (
+        "[0:v]split=2[s][c];"
+        f"[s]fps=1/{interval},scale={tile_w}:{tile_h},tile={cols}x{rows}[sprite];"
+        f"[c]fps={POSTER_CANDIDATES}/{duration:.3f},scale=640:-2[cand]"
+    )
+    cmd = ['ffmpeg', '-y']
+    if duration >= PREVIEW_KEYFRAMES_ONLY_AFTER:
+        # Uzun videoda faqat keyframe lar decode qilinadi — bir necha marta tezroq
+        cmd += ['-skip_frame', 'nokey']
+    cmd += [
+        *_input_args(input_path), '-filter_complex', filters,
+        '-map', '[sprite]', '-q:v', '5', '-start_number', '0', os.path.join(output_dir, 'sprite_%03d.jpg'),
+        '-map', '[cand]', '-frames:v', str(POSTER_CANDIDATES), '-q:v', '2',
+        os.path.join(output_dir, 'candidate_%02d.jpg'),
+    ]
+    subprocess.run(cmd, check=True, capture_output=True, text=True)
+
+    files = sorted(os.listdir(output_dir))
+    candidates = [os.path.join(output_dir, f) for f in files if f.startswith('candidate_')]
+    poster = None
+    if candidates:
+        best = max(candidates, key=frame_variance)
+        poster = os.path.join(output_dir, 'poster.jpg')
+        shutil.copyfile(best, poster)
+
+    sheets = {f for f in files if f.startswith('sprite_')}
+    per_sheet = cols * rows
+    cues = ["WEBVTT", ""]
+    for index in range(int(math.ceil(duration / interval))):
+        sheet = f'sprite_{index // per_sheet:03d}.jpg'
+        if sheet not in sheets:
+            break
+        x = (index % per_sheet) % cols * tile_w
+        y = (index % per_sheet) // cols * tile_h
+        start, end = index * interval, min((index + 1) * interval, duration)
+        cues += [f"{_vtt_time(start)} --> {_vtt_time(end)}", f"{sheet}#xywh={x},{y},{tile_w},{tile_h}", ""]
+    vtt = None
+    if len(cues) > 2:
+        vtt = os.path.join(output_dir, 'thumbnails.vtt')
+        with open(vtt, 'w') as f:
+            f.write("\n".join(cues))
+
+    return {'poster': poster, 'vtt': vtt, 'files': sorted(os.listdir(output_dir))}
 
+
+def save_previews(video, source_path, s3_prefix):
+    """Thumbnail bosqichi: poster -> Video.thumbnail, sprite/VTT/nomzodlar HLS yonida"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
         try:
-            subprocess.run(cmd, check=True, capture_output=True, text=True)
-            bandwidth = int(q['bitrate'].replace('k','')) * 1000
-            master_content += f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={q['width']}x{q['height']}\n"
-            master_content += f"{q['name']}/{q['name']}.m3u8\n\n"
-
-            processed_qualities.append({
-                'quality': q['name'],
-                'width': q['width'],
-                'height': q['height'],
-                'bitrate': q['bitrate'],
-                'playlist': f"{q['name']}/{q['name']}.m3u8"
-            })
+            previews = generate_previews(source_path, tmp_dir, video.duration, video.width, video.height)
         except subprocess.CalledProcessError as e:
-            print(f"FFmpeg xato ({q['name']}): {e.stderr}")
+            print(f"Preview xato: {e.stderr[-500:]}")
+            previews = {'poster': None, 'vtt': None}
+
+        poster = previews['poster']
+        if not poster:
+            poster = os.path.join(tmp_dir, 'poster.jpg')
+            if not generate_thumbnail(source_path, poster):
+                poster = None
+        if poster:
+            with open(poster, 'rb') as f:
+                video.thumbnail.save(f'thumb_{video.id}.jpg', ContentFile(f.read()), save=False)
+
+        if previews['vtt']:
+            upload_directory(tmp_dir, f'{s3_prefix}/thumbs')
+            video.preview_vtt = f'{s3_prefix}/thumbs/thumbnails.vtt'
+
+
+def _bitrate_kbps(bitrate):
+    return int(bitrate.replace('k', ''))
+
+
+def _encode_rendition(input_path, output_dir, q, threads=0, profile=None, progress=None):
+    """Bitta sifatni alohida ffmpeg jarayonida HLS ga o'tkazish"""
+    profile = profile or get_profile()
+    quality_dir = os.path.join(output_dir, q['name'])
+    os.makedirs(quality_dir, exist_ok=True)
+    playlist_file = os.path.join(quality_dir, f"{q['name']}.m3u8")
+    segment_pattern = os.path.join(quality_dir, profile.segment_pattern(q['name']))
+
+    cmd = [
+        'ffmpeg', '-y', *_input_args(input_path),
+        '-vf', f"scale={q['width']}:{q['height']},format=yuv420p",
+        *profile.codec_args(), *profile.rate_args(q['bitrate']), *profile.keyframe_args(),
+        '-c:a', 'aac', '-b:a', '128k', '-ac', '2', '-ar', '48000',
+        '-threads', str(threads),
+        *profile.hls_args(),
+        '-hls_segment_filename', segment_pattern,
+        playlist_file
+    ]
+
+    try:
+        run_ffmpeg(cmd, progress.callback(q['name']) if progress else None)
+    except subprocess.CalledProcessError as e:
+        print(f"FFmpeg xato ({q['name']}): {e.stderr}")
+        return None
+    return {
+        'quality': q['name'],
+        'width': q['width'],
+        'height': q['height'],
+        'bitrate': q['bitrate'],
+        'playlist': f"{q['name']}/{q['name']}.m3u8",
+        'container': profile.container,
+    }
+
 
-    with open(master_playlist_path, 'w') as f:
+def write_master_playlist(output_dir, processed_qualities):
+    # fMP4 segmentlar HLS 7-versiyani talab qiladi
+    version = 7 if any(q.get('container') == 'fmp4' for q in processed_qualities) else 3
+    master_content = f"#EXTM3U\n#EXT-X-VERSION:{version}\n\n"
+    for q in processed_qualities:
+        bandwidth = _bitrate_kbps(q['bitrate']) * 1000
+        master_content += f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={q['width']}x{q['height']}\n"
+        master_content += f"{q['playlist']}\n\n"
+    with open(os.path.join(output_dir, 'master.m3u8'), 'w') as f:
         f.write(master_content)
+
+
+def convert_to_hls(input_path, output_dir, video_id, qualities, workers=1, profile=None, progress=None):
+    """
+    Video'ni HLS formatiga o'tkazish - multi-quality
+
+    workers > 1 bo'lsa sifatlar parallel kodlanadi. Celery prefork child
+    jarayonlari daemon bo'lgani uchun multiprocessing emas, thread pool
+    ishlatiladi — og'ir ish baribir alohida ffmpeg jarayonlarida.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers, len(qualities)))
+    # Yadrolar jarayonlar orasida bo'linadi, aks holda libx264 oversubscribe qiladi
+    threads = max(1, (os.cpu_count() or 1) // workers) if workers > 1 else 0
+
+    if workers == 1:
+        results = [_encode_rendition(input_path, output_dir, q, profile=profile, progress=progress) for q in qualities]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                lambda q: _encode_rendition(input_path, output_dir, q, threads, profile, progress), qualities
+            ))
+
+    processed_qualities = [r for r in results if r]
+    write_master_playlist(output_dir, processed_qualities)
     return processed_qualities
 
+
+def convert_to_hls_single_pass(input_path, output_dir, qualities, has_audio=True, profile=None, progress=None):
+    """
+    Manba bir marta decode qilinadi: split filtri orqali har sifatga
+    scale, so'ng var_stream_map bilan barcha renditionlar va master.m3u8
+    bitta ffmpeg jarayonida yoziladi.
+    """
+    profile = profile or get_profile()
+    os.makedirs(output_dir, exist_ok=True)
+    for q in qualities:
+        os.makedirs(os.path.join(output_dir, q['name']), exist_ok=True)
+
+    n = len(qualities)
+    split_outputs = ''.join(f"[v{i}]" for i in range(n))
+    filters = [f"[0:v]split={n}{split_outputs}"]
+    filters += [
+        f"[v{i}]scale={q['width']}:{q['height']},format=yuv420p[v{i}out]" for i, q in enumerate(qualities)
+    ]
+
+    cmd = ['ffmpeg', '-y', *_input_args(input_path), '-filter_complex', ';'.join(filters)]
+    stream_map = []
+    for i, q in enumerate(qualities):
+        cmd += ['-map', f"[v{i}out]", *profile.rate_args(q['bitrate'], index=i)]
+        if has_audio:
+            cmd += ['-map', '0:a:0']
+            stream_map.append(f"v:{i},a:{i},name:{q['name']}")
+        else:
+            stream_map.append(f"v:{i},name:{q['name']}")
+
+    # Barcha renditionlarda keyframe lar bir joyda — player sifat almashtira oladi
+    cmd += [*profile.codec_args(), *profile.keyframe_args()]
+    if has_audio:
+        cmd += ['-c:a', 'aac', '-b:a', '128k', '-ac', '2', '-ar', '48000']
+    cmd += [
+        # temp_file: segment yopilguncha .tmp nomida — SegmentUploader chala faylni olmaydi
+        *profile.hls_args(),
+        # ffmpeg %v ni yo'lda faqat bir marta qabul qiladi — papka nomida
+        '-hls_segment_filename', os.path.join(output_dir, '%v', profile.segment_pattern()),
+        '-master_pl_name', 'master.m3u8',
+        '-var_stream_map', ' '.join(stream_map),
+        os.path.join(output_dir, '%v', 'index.m3u8'),
+    ]
+
+    try:
+        # Bitta jarayon barcha sifatlarni birdaniga yozadi
+        run_ffmpeg(cmd, progress.callback('single_pass', weight=n) if progress else None)
+    except subprocess.CalledProcessError as e:
+        print(f"FFmpeg xato (single pass): {e.stderr}")
+        return []
+
+    return [
+        {
+            'quality': q['name'],
+            'width': q['width'],
+            'height': q['height'],
+            'bitrate': q['bitrate'],
+            'playlist': f"{q['name']}/index.m3u8",
+            'container': profile.container,
+        }
+        for q in qualities
+    ]
+
+
+def encode_hls(input_path, output_dir, video_id, qualities, has_audio=True, mode=None, profile=None, progress=None,
+               uploader=None):
+    """VIDEO_ENCODE_MODE bo'yicha mos usulni tanlash"""
+    mode = mode or VIDEO_ENCODE_MODE
+    if mode == 'single_pass':
+        processed = convert_to_hls_single_pass(input_path, output_dir, qualities, has_audio, profile, progress)
+        if processed:
+            return processed
+        # Ba'zi manbalar (masalan, g'alati audio) uchun zaxira yo'l. Yiqilgan
+        # urinishning chala segment/playlistlari yuklanib ketmasligi uchun papka tozalanadi
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.makedirs(output_dir, exist_ok=True)
+        if uploader:
+            # Zaxira yo'l boshqa nomdagi segmentlar yozadi — S3 ga chiqib ulgurganlari o'chiriladi
+            uploader.reset()
+        mode = 'parallel'
+    workers = ENCODE_WORKERS if mode == 'parallel' else 1
+    return convert_to_hls(input_path, output_dir, video_id, qualities, workers=workers, profile=profile, progress=progress)
+
 def upload_directory_to_s3(local_dir, s3_prefix, bucket='media'):
-    """Directory'ni S3 ga yuklash"""
+    """Directory'ni S3 ga parallel yuklash (playlistlar oxirida), manifest qaytaradi"""
+    return upload_directory(local_dir, s3_prefix, bucket=bucket)
+
+def delete_s3_prefix(s3_prefix, bucket='media'):
+    """Prefix ostidagi barcha obyektlarni o'chirish (vaqtinchalik bo'laklar uchun)"""
     s3_client = get_s3_client()
-    uploaded_files = []
-    for root, _, files in os.walk(local_dir):
-        for file in files:
-            local_path = os.path.join(root, file)
-            relative_path = os.path.relpath(local_path, local_dir)
-            s3_path = os.path.join(s3_prefix, relative_path).replace('\\', '/')
-            content_type = 'application/x-mpegURL' if file.endswith('.m3u8') else 'video/MP2T'
-            try:
-                s3_client.upload_file(local_path, bucket, s3_path,
-                    ExtraArgs={'ContentType': content_type, 'ACL': 'public-read'})
-                uploaded_files.append(s3_path)
-            except Exception as e:
-                print(f"Upload xato ({s3_path}): {e}")
-    return uploaded_files
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=f'{s3_prefix}/'):
+        objects = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+        if objects:
+            s3_client.delete_objects(Bucket=bucket, Delete={'Objects': objects})
 
-@shared_task(bind=True)
+
+def save_video_qualities(video, s3_prefix, processed_qualities, manifest=None):
+    """Yuklangan renditionlarni is_ready=True qilib belgilash (rendition checkpoint i)"""
+    for q in processed_qualities:
+        defaults = {
+            'width': q['width'],
+            'height': q['height'],
+            'bitrate': q['bitrate'],
+            'file_path': f"{s3_prefix}/{q['playlist']}",
+            'container': q.get('container', 'ts'),
+            'is_ready': True
+        }
+        if manifest:
+            quality_prefix = f"{s3_prefix}/{q['quality']}/"
+            defaults['file_size'] = sum(f['bytes'] for f in manifest['files'] if f['key'].startswith(quality_prefix))
+        VideoQuality.objects.update_or_create(video=video, quality=q['quality'], defaults=defaults)
+
+
+def ensure_qualities_ready(video, qualities):
+    """
+    'renditions' checkpoint idan oldin: rejadagi har sifat yuklangan bo'lishi shart.
+    Kodlashda tushib qolgan sifat bo'lsa xato — retry faqat ularni qayta kodlaydi.
+    """
+    ready = set(video.qualities.filter(is_ready=True).values_list('quality', flat=True))
+    missing = [q['name'] for q in qualities if q['name'] not in ready]
+    if missing:
+        raise RuntimeError(f"Sifatlar kodlanmadi: {', '.join(missing)}")
+
+
+def mark_stage(video, stage, progress=None):
+    """Bosqich checkpoint ini saqlash"""
+    video.processing_stage = stage
+    fields = ['processing_stage', 'updated_at']
+    if progress is not None:
+        video.processing_progress = progress
+        fields.append('processing_progress')
+    video.save(update_fields=fields)
+
+
+def encode_and_upload(video, source_path, qualities, s3_prefix, progress=None):
+    """Berilgan sifatlarni kodlab yuklash va har birini tayyor deb belgilash"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        uploader = SegmentUploader(tmp_dir, s3_prefix).start() if PIPELINED_UPLOAD else None
+        try:
+            processed_qualities = encode_hls(
+                source_path, tmp_dir, video.id, qualities, has_audio=video.has_audio,
+                profile=get_profile(video.encoder_profile), progress=progress, uploader=uploader,
+            )
+        except Exception:
+            if uploader:
+                uploader.abort()
+            raise
+        # master.m3u8 ni finalize bosqichi barcha tayyor sifatlardan yozadi
+        master_path = os.path.join(tmp_dir, 'master.m3u8')
+        if os.path.exists(master_path):
+            os.unlink(master_path)
+        manifest = uploader.finish() if uploader else upload_directory_to_s3(tmp_dir, s3_prefix)
+    save_video_qualities(video, s3_prefix, processed_qualities, manifest)
+    return processed_qualities
+
+
+def finalize_hls(video, s3_prefix):
+    """Tayyor renditionlardan master.m3u8 ni yozib, eng oxirida yuklash"""
+    ready = [
+        {
+            'quality': q.quality,
+            'width': q.width,
+            'height': q.height,
+            'bitrate': q.bitrate,
+            'playlist': q.file_path[len(s3_prefix) + 1:],
+            'container': q.container,
+        }
+        for q in video.qualities.filter(is_ready=True).order_by('height')
+    ]
+    if not ready:
+        raise ValueError("Tayyor sifat topilmadi")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        write_master_playlist(tmp_dir, ready)
+        upload_file(os.path.join(tmp_dir, 'master.m3u8'), f'{s3_prefix}/master.m3u8')
+
+    video.hls_playlist = f'{s3_prefix}/master.m3u8'
+    video.status = 'completed'
+    video.processing_stage = 'finalize'
+    video.processing_progress = 100
+    video.processing_error = ''
+    video.processed_at = timezone.now()
+    video.save(update_fields=[
+        'hls_playlist', 'status', 'processing_stage', 'processing_progress', 'processing_error',
+        'processed_at', 'updated_at',
+    ])
+
+
+# -------------------- Bo'laklab (distributed) kodlash --------------------
+def _chunk_prefix(video_id):
+    return f'videos/chunks/{video_id}'
+
+
+def split_into_chunks(input_path, output_dir, chunk_duration, has_audio=True):
+    """
+    Manbani qayta kodlamasdan (-c copy) bo'laklarga bo'lish. Segment muxer
+    faqat keyframe da kesadi, shuning uchun har bo'lak mustaqil decode bo'ladi.
+    Audio bo'laklarga qo'shilmaydi — bir marta butunligicha kodlanadi, aks holda
+    har bo'lak boshidagi AAC priming chegaralarda uzilish beradi.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cmd = [
+        'ffmpeg', '-y', *_input_args(input_path),
+        '-map', '0:v:0', '-an', '-c:v', 'copy',
+        '-f', 'segment', '-segment_time', str(chunk_duration),
+        '-segment_format', 'mp4', '-reset_timestamps', '1',
+        os.path.join(output_dir, 'chunk_%04d.mp4'),
+    ]
+    if has_audio:
+        cmd += [
+            '-map', '0:a:0', '-vn', '-c:a', 'aac', '-b:a', '128k', '-ac', '2', '-ar', '48000',
+            os.path.join(output_dir, 'audio.m4a'),
+        ]
+    subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return sorted(f for f in os.listdir(output_dir) if f.startswith('chunk_'))
+
+
+def encode_chunk_renditions(chunk_path, output_dir, qualities, profile=None):
+    """
+    Bitta bo'lakni barcha sifatlarga kodlash (bitta decode, har sifat alohida mp4).
+    Keyframe lar segment uzunligida — keyin HLS ga -c copy bilan bo'linadi.
+    """
+    profile = profile or get_profile()
+    os.makedirs(output_dir, exist_ok=True)
+    n = len(qualities)
+    split_outputs = ''.join(f"[v{i}]" for i in range(n))
+    filters = [f"[0:v]split={n}{split_outputs}"]
+    filters += [
+        f"[v{i}]scale={q['width']}:{q['height']},format=yuv420p[v{i}out]" for i, q in enumerate(qualities)
+    ]
+
+    cmd = ['ffmpeg', '-y', '-i', chunk_path, '-filter_complex', ';'.join(filters)]
+    for i, q in enumerate(qualities):
+        cmd += [
+            '-map', f"[v{i}out]", '-an',
+            *profile.codec_args(), *profile.rate_args(q['bitrate']), *profile.keyframe_args(),
+            os.path.join(output_dir, f"{q['name']}.mp4"),
+        ]
+    subprocess.run(cmd, check=True, capture_output=True, text=True)
+
+
+def package_chunks_to_hls(concat_list, audio_path, output_dir, q, profile=None):
+    """Kodlangan bo'laklarni concat demuxer bilan ulab, qayta kodlamasdan HLS ga bo'lish"""
+    profile = profile or get_profile()
+    quality_dir = os.path.join(output_dir, q['name'])
+    os.makedirs(quality_dir, exist_ok=True)
+
+    cmd = ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_list]
+    if audio_path:
+        cmd += ['-i', audio_path, '-map', '0:v:0', '-map', '1:a:0']
+    cmd += [
+        '-c', 'copy',
+        *profile.hls_args(),
+        '-hls_segment_filename', os.path.join(quality_dir, profile.segment_pattern()),
+        os.path.join(quality_dir, 'index.m3u8'),
+    ]
+    subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return {
+        'quality': q['name'],
+        'width': q['width'],
+        'height': q['height'],
+        'bitrate': q['bitrate'],
+        'playlist': f"{q['name']}/index.m3u8",
+        'container': profile.container,
+    }
+
+
+def dispatch_chunked_encode(video, source_path, qualities, has_audio):
+    """
+    Manbani bo'laklab S3 ga yuklash va chord ni ishga tushirish:
+    har bo'lak — alohida encode_video_chunk, oxirida finalize_chunked_video.
+    """
+    prefix = _chunk_prefix(video.id)
+    with tempfile.TemporaryDirectory() as chunk_dir:
+        chunks = split_into_chunks(source_path, chunk_dir, CHUNK_DURATION, has_audio)
+        if not chunks:
+            raise ValueError("Video bo'laklarga bo'linmadi")
+        upload_directory(chunk_dir, prefix)
+
+    # Chord dan oldin checkpoint: acks_late bilan qayta yetkazilgan process_video
+    # shu video uchun ikkinchi chord yubormaydi
+    mark_stage(video, 'dispatched', progress=10)
+
+    # 10% dan 90% gacha bo'laklar orasida teng bo'linadi
+    step = max(1, 80 // len(chunks))
+    priority = video_task_priority(duration=video.duration)
+    header = [
+        encode_video_chunk.s(
+            str(video.id), index, f'{prefix}/{name}', qualities, step, profile_name=video.encoder_profile,
+        ).set(priority=priority)
+        for index, name in enumerate(chunks)
+    ]
+    callback = finalize_chunked_video.s(
+        str(video.id), qualities, has_audio, profile_name=video.encoder_profile,
+    ).set(priority=priority).on_error(
+        chunked_video_failed.s(video_id=str(video.id))
+    )
+    return chord(header)(callback)
+
+
+def compute_content_hash(file_key, bucket='media'):
+    """Asl faylni S3 dan oqim bilan o'qib SHA-256 hisoblash (diskka yozilmaydi)"""
+    body = get_s3_client().get_object(Bucket=bucket, Key=file_key)['Body']
+    digest = hashlib.sha256()
+    for chunk in body.iter_chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def reuse_transcoded_video(video):
+    """
+    Xuddi shu content_hash li tayyor video bo'lsa, uning HLS prefiksi va
+    VideoQuality renditionlarini shu video ga ulash. Asl video qaytadi, yo'q bo'lsa None.
+    """
+    original = (
+        Video.objects.filter(content_hash=video.content_hash, status='completed')
+        .exclude(id=video.id)
+        .exclude(hls_playlist='')
+        .order_by('processed_at')
+        .first()
+    )
+    if original is None:
+        return None
+    qualities = list(original.qualities.filter(is_ready=True))
+    if not qualities:
+        return None
+
+    for field in ('duration', 'width', 'height', 'fps', 'bitrate', 'codec', 'file_size', 'hls_playlist', 'preview_vtt'):
+        setattr(video, field, getattr(original, field))
+    if original.thumbnail and not video.thumbnail:
+        video.thumbnail = original.thumbnail.name
+    for q in qualities:
+        VideoQuality.objects.update_or_create(
+            video=video,
+            quality=q.quality,
+            defaults={
+                'width': q.width,
+                'height': q.height,
+                'bitrate': q.bitrate,
+                'file_path': q.file_path,
+                'file_size': q.file_size,
+                'container': q.container,
+                'is_ready': True
+            }
+        )
+    video.status = 'completed'
+    video.processing_stage = 'finalize'
+    video.processing_progress = 100
+    video.processing_error = ''
+    video.processed_at = timezone.now()
+    video.save(update_fields=[
+        'duration', 'width', 'height', 'fps', 'bitrate', 'codec', 'file_size', 'hls_playlist', 'preview_vtt',
+        'thumbnail', 'status', 'processing_stage', 'processing_progress', 'processing_error', 'processed_at',
+        'updated_at',
+    ])
+    return original
+
+
+@shared_task(bind=True, max_retries=VIDEO_MAX_RETRIES, acks_late=True, reject_on_worker_lost=True)
 def process_video(self, video_id):
-    """Asosiy video processing task"""
+    """
+    Asosiy video processing task.
+
+    Bosqichlar: probe -> thumbnail -> renditions -> finalize. Har biri
+    Video.processing_stage ga, har sifat VideoQuality.is_ready ga yoziladi —
+    qayta urinish (retry yoki worker o'lgandan keyin redelivery) birinchi
+    tugamagan bosqichdan davom etadi va tayyor sifatlarni qayta kodlamaydi.
+    """
     try:
         video = Video.objects.get(id=video_id)
+        if video.stage_done('finalize'):
+            return {'status': 'success', 'video_id': str(video_id), 'hls_url': video.get_hls_url()}
+        if video.processing_stage == 'dispatched':
+            # Bo'laklar chord da kodlanmoqda — finalize_chunked_video yakunlaydi
+            return {'status': 'dispatched', 'video_id': str(video_id)}
         video.status = 'processing'
-        video.processing_progress = 0
-        video.save()
+        if not video.processing_stage:
+            video.processing_progress = 0
+        video.save(update_fields=['status', 'processing_progress', 'updated_at'])
 
         if not video.original_file:
             raise ValueError("Video fayl topilmadi")
@@ -141,59 +752,164 @@ def process_video(self, video_id):
         s3_client = get_s3_client()
         s3_client.head_object(Bucket='media', Key=file_key)
 
-        # Faylni yuklab olish
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
-            s3_client.download_fileobj('media', file_key, tmp_file)
-            tmp_file_path = tmp_file.name
-
-        # Video info
-        video_info = get_video_info(tmp_file_path)
-        video.duration = video_info['duration']
-        video.width = video_info['width']
-        video.height = video_info['height']
-        video.fps = video_info['fps']
-        video.bitrate = video_info['bitrate']
-        video.codec = video_info['codec']
-        video.file_size = video_info['file_size']
-        video.save()
-
-        # Thumbnail yaratish
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as thumb_file:
-            thumb_path = thumb_file.name
-        if generate_thumbnail(tmp_file_path, thumb_path):
-            with open(thumb_path, 'rb') as f:
-                video.thumbnail.save(f'thumb_{video_id}.jpg', ContentFile(f.read()), save=True)
-            os.unlink(thumb_path)
-
-        # HLS ga o'tkazish
-        max_height = video.height
-        qualities_to_process = [q for q in VIDEO_QUALITIES if q['height'] <= max_height] or [VIDEO_QUALITIES[0]]
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            processed_qualities = convert_to_hls(tmp_file_path, tmp_dir, video_id, qualities_to_process)
+        if DEDUPLICATE and not video.processing_stage:
+            # Hash har qanday ffmpeg dan oldin, shu video navbatida — dedupe yangi
+            # yuklamada ham ishlashi uchun. Retry da saqlangan qiymat ishlatiladi
+            if not video.content_hash:
+                video.content_hash = compute_content_hash(file_key)
+                video.save(update_fields=['content_hash', 'updated_at'])
+            # Bir xil fayl oldin kodlangan — ffmpeg umuman ishga tushmaydi
+            original = reuse_transcoded_video(video)
+            if original is not None:
+                return {
+                    'status': 'duplicate',
+                    'video_id': str(video_id),
+                    'original_id': str(original.id),
+                    'hls_url': video.get_hls_url(),
+                }
+
+        s3_prefix = f'videos/hls/{video_id}'
+        if not video.stage_done('renditions'):
+            # Manba: to'liq yuklab olinadi yoki presigned URL orqali oqim sifatida o'qiladi
+            with open_video_source(file_key) as source_path:
+                if not video.stage_done('probe'):
+                    video_info = get_video_info(source_path)
+                    video.duration = video_info['duration']
+                    video.width = video_info['width']
+                    video.height = video_info['height']
+                    video.fps = video_info['fps']
+                    video.bitrate = video_info['bitrate']
+                    video.codec = video_info['codec']
+                    video.file_size = video_info['file_size']
+                    video.has_audio = video_info['has_audio']
+                    # Ladder (complexity probe test kodlashlari bilan) checkpoint ga yoziladi
+                    video.planned_qualities = plan_for_video(video, source_path)
+                    video.processing_stage = 'probe'
+                    video.processing_progress = 5
+                    video.save(update_fields=[
+                        'duration', 'width', 'height', 'fps', 'bitrate', 'codec', 'file_size', 'has_audio',
+                        'planned_qualities', 'processing_stage', 'processing_progress', 'updated_at',
+                    ])
+
+                if not video.stage_done('thumbnail'):
+                    save_previews(video, source_path, s3_prefix)
+                    video.processing_stage = 'thumbnail'
+                    video.processing_progress = 10
+                    video.save(update_fields=[
+                        'thumbnail', 'preview_vtt', 'processing_stage', 'processing_progress', 'updated_at',
+                    ])
+
+                # HLS ga o'tkazish — manbaga mos ladder, faqat hali tayyor bo'lmagan sifatlar
+                if not video.planned_qualities:
+                    # Probe bosqichi ladder saqlanishidan oldin o'tgan videolar
+                    video.planned_qualities = plan_for_video(video, source_path)
+                    video.save(update_fields=['planned_qualities', 'updated_at'])
+                qualities_to_process = video.planned_qualities
+                ready = set(video.qualities.filter(is_ready=True).values_list('quality', flat=True))
+                pending = [q for q in qualities_to_process if q['name'] not in ready]
+
+                if pending and CHUNKED_MIN_DURATION and video.duration >= CHUNKED_MIN_DURATION:
+                    # Uzun video: bo'laklar boshqa worker larda kodlanadi, status ni finalize qo'yadi
+                    dispatch_chunked_encode(video, source_path, pending, video.has_audio)
+                    return {'status': 'dispatched', 'video_id': str(video_id)}
+
+                # 'serial' rejimda har sifat alohida checkpoint
+                batches = [[q] for q in pending] if VIDEO_ENCODE_MODE == 'serial' else [pending]
+                # 10% dan 90% gacha batchlar orasida teng bo'linadi
+                step = 80 / max(1, len(batches))
+                for i, batch in enumerate(batches):
+                    if batch:
+                        progress = ProgressReporter(
+                            video.id, video.duration, start=int(10 + step * i), end=int(10 + step * (i + 1)),
+                            parts=len(batch), stage=video.processing_stage,
+                        )
+                        encode_and_upload(video, source_path, batch, s3_prefix, progress)
+
+                ensure_qualities_ready(video, qualities_to_process)
+            mark_stage(video, 'renditions', progress=90)
+
+        finalize_hls(video, s3_prefix)
+        return {'status': 'success', 'video_id': str(video_id), 'hls_url': video.get_hls_url()}
+
+    except Exception as e:
+        print(f"❌ Xato: {str(e)}")
+        video.processing_error = str(e)
+        if self.request.retries < self.max_retries:
+            # Checkpointlar saqlanib qoladi, retry tugamagan bosqichdan boshlaydi
+            video.save(update_fields=['processing_error', 'updated_at'])
+            raise self.retry(exc=e, countdown=VIDEO_RETRY_DELAY)
+        video.status = 'failed'
+        video.save(update_fields=['status', 'processing_error', 'updated_at'])
+        raise
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=30)
+def encode_video_chunk(self, video_id, index, chunk_key, qualities, step, profile_name=None):
+    """Bitta bo'lakni barcha sifatlarga kodlab, natijani S3 ga qaytarish"""
+    s3_client = get_s3_client()
+    prefix = _chunk_prefix(video_id)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        chunk_path = os.path.join(tmp_dir, 'source.mp4')
+        s3_client.download_file('media', chunk_key, chunk_path)
+        output_dir = os.path.join(tmp_dir, 'encoded')
+        try:
+            encode_chunk_renditions(chunk_path, output_dir, qualities, get_profile(profile_name))
+        except subprocess.CalledProcessError as e:
+            print(f"FFmpeg xato (bo'lak {index}): {e.stderr}")
+            raise self.retry(exc=e)
+        for q in qualities:
+            upload_file(
+                os.path.join(output_dir, f"{q['name']}.mp4"),
+                f"{prefix}/encoded/{q['name']}/chunk_{index:04d}.mp4",
+            )
+
+    # Faqat bitta ustun yangilanadi — parallel bo'laklar bir-birini bosib ketmaydi
+    Video.objects.filter(id=video_id).update(
+        processing_progress=Least(F('processing_progress') + step, 90)
+    )
+    # Endi haqiqiy qiymat DB da — polling endpoint keshdagi eski foizni ko'rsatmasin
+    clear_progress(video_id)
+    return index
+
+
+@shared_task(bind=True)
+def finalize_chunked_video(self, chunk_indexes, video_id, qualities, has_audio, profile_name=None):
+    """Chord callback: bo'laklarni har sifat uchun ulab, HLS ga joylash"""
+    video = Video.objects.get(id=video_id)
+    s3_client = get_s3_client()
+    prefix = _chunk_prefix(video_id)
+    profile = get_profile(profile_name)
+    try:
+        with tempfile.TemporaryDirectory() as work_dir, tempfile.TemporaryDirectory() as hls_dir:
+            audio_path = None
+            if has_audio:
+                audio_path = os.path.join(work_dir, 'audio.m4a')
+                s3_client.download_file('media', f'{prefix}/audio.m4a', audio_path)
+
+            processed_qualities = []
+            for q in qualities:
+                quality_dir = os.path.join(work_dir, q['name'])
+                os.makedirs(quality_dir)
+                concat_list = os.path.join(quality_dir, 'concat.txt')
+                with open(concat_list, 'w') as f:
+                    for index in sorted(chunk_indexes):
+                        local_path = os.path.join(quality_dir, f'chunk_{index:04d}.mp4')
+                        s3_client.download_file(
+                            'media', f"{prefix}/encoded/{q['name']}/chunk_{index:04d}.mp4", local_path
+                        )
+                        f.write(f"file '{local_path}'\n")
+                processed_qualities.append(package_chunks_to_hls(concat_list, audio_path, hls_dir, q, profile))
+                # Disk faqat bitta sifat bo'laklarini ushlab turadi
+                shutil.rmtree(quality_dir)
+
             s3_prefix = f'videos/hls/{video_id}'
-            upload_directory_to_s3(tmp_dir, s3_prefix)
-            video.hls_playlist = f'{s3_prefix}/master.m3u8'
-            video.save()
-
-            # VideoQuality yaratish
-            for q in processed_qualities:
-                VideoQuality.objects.update_or_create(
-                    video=video,
-                    quality=q['quality'],
-                    defaults={
-                        'width': q['width'],
-                        'height': q['height'],
-                        'bitrate': q['bitrate'],
-                        'file_path': f"{s3_prefix}/{q['playlist']}",
-                        'is_ready': True
-                    }
-                )
+            manifest = upload_directory_to_s3(hls_dir, s3_prefix)
 
-        os.unlink(tmp_file_path)
-        video.status = 'completed'
-        video.processing_progress = 100
-        video.processed_at = timezone.now()
-        video.save()
+        save_video_qualities(video, s3_prefix, processed_qualities, manifest)
+        ensure_qualities_ready(video, qualities)
+        mark_stage(video, 'renditions', progress=90)
+        finalize_hls(video, s3_prefix)
+        delete_s3_prefix(prefix)
 
         return {'status': 'success', 'video_id': str(video_id), 'hls_url': video.get_hls_url()}
 
@@ -201,5 +917,16 @@ def process_video(self, video_id):
         print(f"❌ Xato: {str(e)}")
         video.status = 'failed'
         video.processing_error = str(e)
-        video.save()
+        if video.processing_stage == 'dispatched':
+            # Qayta ishga tushirilganda tayyor bo'lmagan sifatlar qaytadan yuboriladi
+            video.processing_stage = 'thumbnail'
+        video.save(update_fields=['status', 'processing_error', 'processing_stage', 'updated_at'])
         raise
+
+
+@shared_task
+def chunked_video_failed(request, exc, traceback, video_id=None):
+    """Chord dagi biror bo'lak yiqilsa, callback ishlamaydi — video ni shu yerda failed qilamiz"""
+    Video.objects.filter(id=video_id).update(status='failed', processing_error=str(exc), processing_stage='thumbnail')
+    clear_progress(video_id)
+    delete_s3_prefix(_chunk_prefix(video_id))
@@ -161,3 +161,80 @@ from django.test import TestCase
 #             user=self.user
 #         )
 #         self.assertEqual(test_case.get_summary(), "Test - Input: [2,7,11,15]...")
+
+
+from django.contrib.auth import get_user_model
+
+from utils import search
+from .models import Problem
+
+
+class InMemorySearchTest(TestCase):
+    """SQLite fallback: utils.search.InMemoryIndex (PostgreSQL da search_vector ishlatiladi)"""
+
+    def setUp(self):
+        search._indexes.clear()
+        self.user = get_user_model().objects.create_user(username="searcher", email="searcher@example.com", password="password123")
+
+    def tearDown(self):
+        search._indexes.clear()
+
+    def make(self, title, description="", **kwargs):
+        return Problem.objects.create(title=title, description=description, user=self.user, **kwargs)
+
+    def search_titles(self, query, queryset=None):
+        queryset = Problem.objects.all() if queryset is None else queryset
+        return [p.title for p in search.search_queryset(queryset, query)]
+
+    def test_fallback_is_used_on_sqlite(self):
+        self.assertFalse(search.is_postgres())
+
+    def test_title_match_ranks_above_description_match(self):
+        self.make("Massiv aylantirish", "Elementlarni surish")
+        self.make("Ikki son yig'indisi", "Massiv ichidan ikki sonni toping")
+        self.assertEqual(self.search_titles("massiv"), ["Massiv aylantirish", "Ikki son yig'indisi"])
+
+    def test_all_terms_must_match(self):
+        self.make("Massiv aylantirish", "Chapga surish")
+        self.make("Massiv saralash", "O'sish tartibida")
+        self.assertEqual(self.search_titles("massiv surish"), ["Massiv aylantirish"])
+        self.assertEqual(self.search_titles("massiv daraxt"), [])
+
+    def test_case_insensitive_and_empty_query(self):
+        self.make("Binar Qidiruv")
+        self.assertEqual(self.search_titles("BINAR"), ["Binar Qidiruv"])
+        self.assertEqual(self.search_titles("  "), [])
+
+    def test_rare_term_outweighs_common_term(self):
+        self.make("Graf yo'llar", "graf graf")
+        self.make("Graf daraxt")
+        self.make("Graf sikl")
+        target = self.make("Dinamik graf", "dinamik")
+        self.assertEqual(self.search_titles("dinamik graf")[0], target.title)
+
+    def test_queryset_filters_are_kept(self):
+        self.make("Stek amallari", difficulty=1)
+        self.make("Stek va navbat", difficulty=3, is_active=False)
+        active = Problem.objects.filter(is_active=True)
+        self.assertEqual(self.search_titles("stek", active), ["Stek amallari"])
+
+    def test_index_follows_updates_and_deletes(self):
+        problem = self.make("Eski nom")
+        self.assertEqual(self.search_titles("eski"), ["Eski nom"])
+
+        problem.title = "Yangi nom"
+        problem.save()
+        self.assertEqual(self.search_titles("eski"), [])
+        self.assertEqual(self.search_titles("yangi"), ["Yangi nom"])
+
+        problem.delete()
+        self.assertEqual(self.search_titles("yangi"), [])
+        self.assertNotIn(problem.pk, search.get_memory_index(Problem)._doc_terms)
+
+    def test_update_fields_with_title_reindexes(self):
+        problem = self.make("Satr teskari")
+        self.search_titles("satr")  # indeks quriladi
+        problem.title = "Palindrom"
+        problem.save(update_fields=["title"])
+        self.assertEqual(self.search_titles("satr"), [])
+        self.assertEqual(self.search_titles("palindrom"), ["Palindrom"])
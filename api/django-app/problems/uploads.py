@@ -0,0 +1,98 @@
+# ==================== problems/uploads.py ====================
+"""
+Video asl faylini brauzerdan to'g'ridan-to'g'ri MinIO ga multipart yuklash.
+
+    1. start    — S3 multipart upload ochiladi, har bo'lak uchun presigned PUT URL
+    2. klient bo'laklarni parallel yuklaydi (baytlar Django/gunicorn dan o'tmaydi)
+    3. complete — bo'laklar yig'iladi, Video yaratiladi, post_save process_video ni navbatga qo'yadi
+
+Ochiq upload sessiyasi (kalit, egasi, hajm) Redis da saqlanadi — complete/abort
+faqat shu API bergan kalit bilan va faqat boshlagan foydalanuvchi uchun ishlaydi.
+"""
+import math
+import os
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from utils.s3 import (
+    abort_multipart_upload,
+    complete_multipart_upload,
+    create_multipart_upload,
+    delete_object,
+    presign_upload_parts,
+)
+
+UPLOAD_PREFIX = 'videos/originals'
+UPLOAD_PART_SIZE = getattr(settings, 'VIDEO_UPLOAD_PART_SIZE', 64 * 1024 * 1024)
+UPLOAD_MAX_SIZE = getattr(settings, 'VIDEO_UPLOAD_MAX_SIZE', 20 * 1024 * 1024 * 1024)
+UPLOAD_URL_EXPIRES = getattr(settings, 'VIDEO_UPLOAD_URL_EXPIRES', 6 * 60 * 60)
+ALLOWED_EXTENSIONS = ('.mp4', '.mov', '.mkv', '.webm', '.avi', '.m4v')
+# S3 cheklovlari
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+
+class UploadError(ValueError):
+    pass
+
+
+def _session_key(upload_id) -> str:
+    return f"video_upload:{upload_id}"
+
+
+def plan_parts(size):
+    """(part_size, part_count) — bo'laklar soni S3 ning 10000 chegarasidan oshmaydi"""
+    part_size = max(UPLOAD_PART_SIZE, MIN_PART_SIZE, math.ceil(size / MAX_PARTS))
+    return part_size, max(1, math.ceil(size / part_size))
+
+
+def start_upload(user_id, filename, size, content_type=None):
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise UploadError(f"Ruxsat etilmagan fayl turi: {ext or filename}")
+    if size <= 0 or size > UPLOAD_MAX_SIZE:
+        raise UploadError(f"Fayl hajmi 1 bayt va {UPLOAD_MAX_SIZE} bayt oralig'ida bo'lishi kerak")
+
+    key = f"{UPLOAD_PREFIX}/{uuid.uuid4().hex}{ext}"
+    upload_id = create_multipart_upload(key, content_type)
+    part_size, part_count = plan_parts(size)
+    cache.set(
+        _session_key(upload_id),
+        {"key": key, "user_id": user_id, "size": size, "part_count": part_count},
+        UPLOAD_URL_EXPIRES,
+    )
+    return {
+        "upload_id": upload_id,
+        "key": key,
+        "part_size": part_size,
+        "parts": presign_upload_parts(key, upload_id, part_count, expires=UPLOAD_URL_EXPIRES),
+    }
+
+
+def _get_session(upload_id, user_id):
+    session = cache.get(_session_key(upload_id))
+    if session is None or session["user_id"] != user_id:
+        raise UploadError("Upload sessiyasi topilmadi yoki muddati o'tgan")
+    return session
+
+
+def finish_upload(upload_id, user_id, parts):
+    """Bo'laklarni yig'ish. Obyekt kaliti va hajmini qaytaradi"""
+    session = _get_session(upload_id, user_id)
+    if len(parts) != session["part_count"]:
+        raise UploadError(f"{session['part_count']} ta bo'lak kutilgan, {len(parts)} ta keldi")
+    size = complete_multipart_upload(session["key"], upload_id, parts)
+    cache.delete(_session_key(upload_id))
+    # Presigned URL bo'lak hajmini cheklamaydi — haqiqiy hajm shu yerda tekshiriladi
+    if size > session["size"] or size > UPLOAD_MAX_SIZE:
+        delete_object(session["key"])
+        raise UploadError(f"Yuklangan fayl ({size} bayt) e'lon qilingan hajmdan ({session['size']} bayt) katta")
+    return session["key"], size
+
+
+def cancel_upload(upload_id, user_id):
+    session = _get_session(upload_id, user_id)
+    abort_multipart_upload(session["key"], upload_id)
+    cache.delete(_session_key(upload_id))
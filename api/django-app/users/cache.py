@@ -0,0 +1,129 @@
+# ==================== users/cache.py ====================
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+IDENTITY_CACHE_TIMEOUT = getattr(settings, 'IDENTITY_CACHE_TIMEOUT', 24 * 60 * 60)
+IDENTITY_LOCAL_SIZE = getattr(settings, 'IDENTITY_LOCAL_CACHE_SIZE', 10000)
+IDENTITY_LOCAL_TTL = getattr(settings, 'IDENTITY_LOCAL_CACHE_TTL', 300)
+LOGIN_FLUSH_INTERVAL = getattr(settings, 'LOGIN_ACTIVITY_FLUSH_INTERVAL', 5)
+
+
+def _identity_key(telegram_id) -> str:
+    return f"identity:tg:{telegram_id}"
+
+
+class _LocalLRU:
+    """Worker ichidagi kichik LRU: telegram_id -> (pk, muddati)"""
+
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+_local = _LocalLRU(IDENTITY_LOCAL_SIZE, IDENTITY_LOCAL_TTL)
+
+
+def get_user_pk(telegram_id) -> Optional[int]:
+    """
+    telegram_id -> BaseUser.pk
+    Tartib: lokal LRU -> Redis -> DB. Topilmagan foydalanuvchi keshlanmaydi
+    (u hali yaratilmagan bo'lishi mumkin).
+    """
+    if not telegram_id:
+        return None
+    pk = _local.get(telegram_id)
+    if pk is not None:
+        return pk
+
+    pk = cache.get(_identity_key(telegram_id))
+    if pk is None:
+        from .models import BaseUser
+
+        pk = BaseUser.objects.filter(telegram_id=telegram_id).values_list("pk", flat=True).first()
+        if pk is None:
+            return None
+        cache.set(_identity_key(telegram_id), pk, IDENTITY_CACHE_TIMEOUT)
+    _local.set(telegram_id, pk)
+    return pk
+
+
+def remember_user(telegram_id, pk) -> None:
+    cache.set(_identity_key(telegram_id), pk, IDENTITY_CACHE_TIMEOUT)
+    _local.set(telegram_id, pk)
+
+
+def forget_user(telegram_id) -> None:
+    cache.delete(_identity_key(telegram_id))
+    _local.delete(telegram_id)
+
+
+class LoginActivityRecorder:
+    """
+    last_login yangilanishlarini buferlab, har `interval` soniyada bitta
+    UPDATE ... WHERE id IN (...) bilan yozadi. Har so'rovda DB ga yozilmaydi.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._pending = set()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, user_pk) -> None:
+        with self._lock:
+            self._pending.add(user_pk)
+            due = time.monotonic() - self._last_flush >= self.interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        from .models import BaseUser
+
+        BaseUser.objects.filter(pk__in=pending).update(last_login=timezone.now())
+
+
+login_activity = LoginActivityRecorder(LOGIN_FLUSH_INTERVAL)
+
+
+@atexit.register
+def _flush_login_activity():
+    try:
+        login_activity.flush()
+    except Exception:
+        pass
@@ -0,0 +1,9 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from .models import BaseUser
+from .cache import forget_user
+
+
+@receiver(post_delete, sender=BaseUser)
+def base_user_deleted(sender, instance, **kwargs):
+    forget_user(instance.telegram_id)
@@ -0,0 +1,17 @@
+from celery import shared_task
+from django.conf import settings
+from utils.auth_service_status import auth_service_get_revoked_sync
+from utils.revocation import store_revoked
+
+
+@shared_task
+def refresh_revoked_tokens():
+    """Auth serverdan revocation list ni olib Redis ga yozish (Celery beat)"""
+    if getattr(settings, 'AUTH_VERIFY_MODE', 'remote') != 'local':
+        return {'status': 'skipped'}
+    revoked, status = auth_service_get_revoked_sync()
+    if revoked is None:
+        # Eski ro'yxat o'z TTL i tugaguncha amal qiladi
+        return {'status': 'failed', 'code': status}
+    store_revoked(revoked)
+    return {'status': 'success', 'count': len(revoked)}
@@ -0,0 +1,65 @@
+# ==================== userstatus/cache.py ====================
+from typing import Iterable, Set
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+SOLVED_SET_TIMEOUT = getattr(settings, 'SOLVED_SET_CACHE_TIMEOUT', 24 * 60 * 60)
+
+# Set DB dan to'liq yuklanganini bildiradi (Problem id lar 1 dan boshlanadi)
+_LOADED_MARKER = 0
+
+
+def _solved_key(user_id) -> str:
+    return cache.make_key(f"solved:{user_id}")
+
+
+def _load_solved(conn, key: str, user_id) -> Set[int]:
+    """Redis da set yo'q bo'lsa — DB dan bir marta yuklab olish"""
+    from .models import UserProblemStatus
+
+    solved = set(
+        UserProblemStatus.objects.filter(user_id=user_id, is_completed=True)
+        .values_list("problem_id", flat=True)
+    )
+    pipe = conn.pipeline()
+    pipe.sadd(key, _LOADED_MARKER, *solved)
+    pipe.expire(key, SOLVED_SET_TIMEOUT)
+    pipe.execute()
+    return solved
+
+
+def solved_among(user_id, problem_ids: Iterable[int]) -> Set[int]:
+    """
+    Berilgan problem_ids dan foydalanuvchi yechganlarini qaytaradi.
+    Faqat joriy sahifadagi id lar tekshiriladi (SMISMEMBER, bitta round trip).
+    """
+    problem_ids = list(problem_ids)
+    if not user_id or not problem_ids:
+        return set()
+
+    conn = get_redis_connection("default")
+    key = _solved_key(user_id)
+    flags = conn.smismember(key, [_LOADED_MARKER, *problem_ids])
+    if not flags[0]:
+        solved = _load_solved(conn, key, user_id)
+        return {pid for pid in problem_ids if pid in solved}
+    return {pid for pid, flag in zip(problem_ids, flags[1:]) if flag}
+
+
+def add_solved(user_id, problem_id) -> None:
+    """
+    Yechilgan masalani set ga qo'shish.
+    Set hali yuklanmagan bo'lsa ham xavfsiz: marker yo'qligi sababli
+    keyingi o'qishda baribir DB dan to'liq yuklanadi.
+    """
+    conn = get_redis_connection("default")
+    key = _solved_key(user_id)
+    pipe = conn.pipeline()
+    pipe.sadd(key, problem_id)
+    pipe.expire(key, SOLVED_SET_TIMEOUT)
+    pipe.execute()
+
+
+def invalidate_solved(user_id) -> None:
+    get_redis_connection("default").delete(_solved_key(user_id))
@@ -1,5 +1,5 @@
 from datetime import timedelta
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from problems.models import Problem
 from django.db.models import Sum, Count
@@ -109,6 +109,9 @@ class UserProblemStatus(TimeMixsin):
                 'date_completed': timezone.now()  # <-- Yangi qator
             }
         )
+        # Redis dagi yechilgan masalalar set ini yangilash
+        from .cache import add_solved
+        transaction.on_commit(lambda: add_solved(user.id, problem.id))
         return obj
 class UserStats(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='stats')
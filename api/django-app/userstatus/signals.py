@@ -1,8 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from solution.models import Solution
 from .models import UserActivityDaily, UserStats, UserProblemStatus
 from django.utils import timezone
+from .cache import invalidate_solved
 
 @receiver(post_save, sender=Solution)
 def solution_created_or_updated(sender, instance, created, **kwargs):
@@ -30,3 +31,15 @@ def solution_created_or_updated(sender, instance, created, **kwargs):
                 UserProblemStatus.mark_completed(instance.user, instance.problem)
     except Exception as e:
         print(f"Yechim yaratilganda yoki yangilanganda xatolik yuz berdi: {e}")
+
+
+@receiver(post_delete, sender=UserProblemStatus)
+def problem_status_deleted(sender, instance, **kwargs):
+    """Yechilgan masalalar set i endi noto'g'ri — keyingi o'qishda DB dan qayta yuklanadi"""
+    invalidate_solved(instance.user_id)
+
+
+@receiver(post_save, sender=UserProblemStatus)
+def problem_status_saved(sender, instance, **kwargs):
+    if not instance.is_completed:
+        invalidate_solved(instance.user_id)
@@ -1,27 +1,87 @@
 # api/utils/auth.py
+import hashlib
+import time
 import jwt
 from ninja.security import HttpBearer
 from django.http import HttpRequest
 from django.conf import settings
-from jwt import ExpiredSignatureError, InvalidTokenError
-from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from jwt import ExpiredSignatureError, InvalidTokenError, PyJWKClient, PyJWKClientError
 from datetime import datetime
+from typing import Optional
 
 from users.models import BaseUser
-from .auth_service_status import auth_service_verify, auth_service_get_current_user
+from users.cache import get_user_pk, remember_user, login_activity
+from .auth_service_status import auth_service_verify_sync, auth_service_get_current_user_sync
+from .revocation import is_revoked
+
+# 'remote' — har yangi token auth serverda tekshiriladi
+# 'local'  — imzo, muddat va lokal revocation list ga ishoniladi
+AUTH_VERIFY_MODE = getattr(settings, "AUTH_VERIFY_MODE", "remote")
+AUTH_JWKS_URL = getattr(settings, "AUTH_JWKS_URL", "")
+AUTH_JWKS_CACHE_TTL = getattr(settings, "AUTH_JWKS_CACHE_TTL", 3600)
+AUTH_JWT_ALGORITHMS = getattr(settings, "AUTH_JWT_ALGORITHMS", ["RS256"])
+
+_jwks_client = None
+
+
+def _get_jwks_client() -> PyJWKClient:
+    """JWKS kalitlari process ichida keshlanadi (PyJWKClient)"""
+    global _jwks_client
+    if _jwks_client is None:
+        _jwks_client = PyJWKClient(AUTH_JWKS_URL, cache_keys=True, lifespan=AUTH_JWKS_CACHE_TTL)
+    return _jwks_client
 
 
 def verify_jwt(token: str):
     """
     JWT tokenini tekshiradi va payload qaytaradi.
+    AUTH_JWKS_URL berilsa — auth server public kaliti, aks holda umumiy SECRET_KEY.
     """
     try:
+        if AUTH_JWKS_URL:
+            key = _get_jwks_client().get_signing_key_from_jwt(token).key
+            return jwt.decode(token, key, algorithms=AUTH_JWT_ALGORITHMS)
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
         return payload
-    except (ExpiredSignatureError, InvalidTokenError):
+    except (ExpiredSignatureError, InvalidTokenError, PyJWKClientError):
         return None
 
 
+AUTH_VERIFY_CACHE_TTL = getattr(settings, "AUTH_VERIFY_CACHE_TTL", 300)
+AUTH_VERIFY_NEGATIVE_TTL = getattr(settings, "AUTH_VERIFY_NEGATIVE_TTL", 30)
+# Faqat auth server aniq rad etgan javoblar salbiy keshlanadi. 5xx va tarmoq
+# xatolari keshlanmaydi — server tiklangach foydalanuvchilar bloklanib qolmasin
+AUTH_REJECTED_STATUSES = (401, 403)
+
+
+def _verified_key(token: str) -> str:
+    # Token o'zi kalitga yozilmaydi — faqat hash
+    return f"auth:verified:{hashlib.sha256(token.encode()).hexdigest()}"
+
+
+def get_cached_verification(token: str) -> Optional[bool]:
+    """True/False — keshlangan natija, None — hali tekshirilmagan"""
+    return cache.get(_verified_key(token))
+
+
+def cache_verification(token: str, payload: dict, ok: bool) -> None:
+    """
+    Ijobiy natija min(exp, AUTH_VERIFY_CACHE_TTL) gacha,
+    salbiy natija esa qisqa muddatga saqlanadi.
+    """
+    if ok:
+        ttl = AUTH_VERIFY_CACHE_TTL
+        exp = payload.get("exp")
+        if exp:
+            ttl = min(ttl, int(exp - time.time()))
+        if ttl <= 0:
+            return
+    else:
+        ttl = AUTH_VERIFY_NEGATIVE_TTL
+    cache.set(_verified_key(token), ok, ttl)
+
+
 class JWTBearer(HttpBearer):
     """
     Ninja uchun JWT autentifikatsiya sinfi.
@@ -29,8 +89,6 @@ class JWTBearer(HttpBearer):
 
     def authenticate(self, request: HttpRequest, token: str):
         payload = verify_jwt(token)
-        print(payload, token)  # Debug uchun
-
         if payload is None:
             return None  # Ninja avtomatik 401
 
@@ -39,39 +97,84 @@ class JWTBearer(HttpBearer):
         if not telegram_id and not username:
             return None
 
-        # User bazada mavjudmi tekshirish
-        if BaseUser.objects.filter(telegram_id=telegram_id).exists():
-            ok, status = async_to_sync(auth_service_verify)(token)
+        if AUTH_VERIFY_MODE == "local":
+            return self._authenticate_local(token, payload, telegram_id)
+        return self._authenticate_remote(token, payload, telegram_id)
+
+    def _authenticate_remote(self, token: str, payload: dict, telegram_id):
+        # Token avval tekshirilgan bo'lsa — auth serverga murojaat qilinmaydi
+        verified = get_cached_verification(token)
+        if verified is not None:
+            if verified:
+                self._record_login(get_user_pk(telegram_id))
+            return payload if verified else None
+
+        # User bazada mavjudmi tekshirish (LRU -> Redis -> DB)
+        user_pk = get_user_pk(telegram_id)
+        if user_pk:
+            ok, status = auth_service_verify_sync(token)
             if ok and status == 200:
+                cache_verification(token, payload, True)
+                self._record_login(user_pk)
                 return payload
+            if status in AUTH_REJECTED_STATUSES:
+                cache_verification(token, payload, False)
             return None
-        else:
-            user_data, status = async_to_sync(auth_service_get_current_user)(token)
-            if status == 200 and "user" in user_data:
-                u = user_data["user"]
-
-                print("user-data", user_data)
-                # last_login formatini tekshirish
-                last_login_val = u.get("last_login")
-                if last_login_val:
+        return self._provision_user(token, payload)
+
+    def _authenticate_local(self, token: str, payload: dict, telegram_id):
+        """
+        Imzo va muddat verify_jwt da tekshirilgan, bu yerda faqat revocation list.
+        Auth serverga faqat yangi foydalanuvchini yaratish uchun murojaat qilinadi.
+        """
+        revoked = is_revoked(token, payload)
+        if revoked:
+            return None
+        if revoked is None:
+            # Revocation list yuklanmagan — bekor qilingan token o'tib ketmasligi uchun auth server tekshiradi
+            return self._authenticate_remote(token, payload, telegram_id)
+        user_pk = get_user_pk(telegram_id)
+        if user_pk:
+            self._record_login(user_pk)
+            return payload
+        return self._provision_user(token, payload)
+
+    def _record_login(self, user_pk):
+        """last_login buferlanadi va bir necha soniyada bir marta yoziladi"""
+        if user_pk:
+            login_activity.record(user_pk)
+
+    def _provision_user(self, token: str, payload: dict):
+        """Birinchi marta ko'rilgan foydalanuvchini auth serverdan olib BaseUser yaratish"""
+        user_data, status = auth_service_get_current_user_sync(token)
+        if status == 200 and "user" in user_data:
+            u = user_data["user"]
+
+            # last_login formatini tekshirish
+            last_login_val = u.get("last_login")
+            if last_login_val:
+                try:
+                    # YYYY-MM-DD HH:MM:SS format
+                    last_login_val = datetime.strptime(last_login_val, "%Y-%m-%d %H:%M:%S")
+                except Exception:
                     try:
-                        # YYYY-MM-DD HH:MM:SS format
-                        last_login_val = datetime.strptime(last_login_val, "%Y-%m-%d %H:%M:%S")
+                        # timestamp bo'lsa
+                        last_login_val = datetime.fromtimestamp(int(last_login_val))
                     except Exception:
-                        try:
-                            # timestamp bo'lsa
-                            last_login_val = datetime.fromtimestamp(int(last_login_val))
-                        except Exception:
-                            last_login_val = None
-                BaseUser.objects.update_or_create(
-                    telegram_id=int(u["user_id"]),
-                    defaults={
-                        "username": u.get("username"),
-                        "phone": u.get("phone"),
-                        "full_name": u.get("full_name"),
-                        "last_login": last_login_val
-                    }
-                )
-                return payload
+                        last_login_val = None
+            user, _ = BaseUser.objects.update_or_create(
+                telegram_id=int(u["user_id"]),
+                defaults={
+                    "username": u.get("username"),
+                    "phone": u.get("phone"),
+                    "full_name": u.get("full_name"),
+                    "last_login": last_login_val
+                }
+            )
+            remember_user(user.telegram_id, user.pk)
+            cache_verification(token, payload, True)
+            return payload
+        if status in AUTH_REJECTED_STATUSES:
+            cache_verification(token, payload, False)
 
         return None
@@ -1,39 +1,155 @@
+import os
+import threading
+import time
 import httpx
+from asgiref.sync import sync_to_async
 from decouple import config
 from typing import Tuple, Optional, Dict
 
 AUTH_SERVER_BASE_URL = config("AUTH_SERVER_BASE_URL")
+AUTH_SERVICE_TIMEOUT = config("AUTH_SERVICE_TIMEOUT", cast=float, default=5.0)
+AUTH_SERVICE_CONNECT_TIMEOUT = config("AUTH_SERVICE_CONNECT_TIMEOUT", cast=float, default=1.0)
+AUTH_SERVICE_MAX_CONNECTIONS = config("AUTH_SERVICE_MAX_CONNECTIONS", cast=int, default=20)
+AUTH_SERVICE_FAILURE_THRESHOLD = config("AUTH_SERVICE_FAILURE_THRESHOLD", cast=int, default=5)
+AUTH_SERVICE_RESET_TIMEOUT = config("AUTH_SERVICE_RESET_TIMEOUT", cast=float, default=30.0)
+# Revocation list ni olish uchun servis tokeni
+AUTH_SERVICE_TOKEN = config("AUTH_SERVICE_TOKEN", default="")
+AUTH_REVOCATION_PATH = config("AUTH_REVOCATION_PATH", default="/api/revoked")
 
 
-async def auth_service_verify(token: str) -> Tuple[bool, Optional[int]]:
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/json",
-    }
+class CircuitBreaker:
+    """
+    Auth server ishlamay qolsa, har so'rov 5 soniya kutib qolmasligi uchun.
 
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        try:
-            resp = await client.get(f"{AUTH_SERVER_BASE_URL}/api/verify", headers=headers)
-            resp.raise_for_status()
-            return True, resp.status_code
-        except httpx.HTTPStatusError as e:
-            return False, e.response.status_code if e.response else None
-        except httpx.RequestError:
-            return False, None
+    closed    — oddiy holat
+    open      — ketma-ket `failure_threshold` xatodan keyin, so'rovlar darhol rad etiladi
+    half-open — `reset_timeout` o'tgach bitta sinov so'rovi o'tkaziladi
+    """
 
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._probing = True  # half-open
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker(AUTH_SERVICE_FAILURE_THRESHOLD, AUTH_SERVICE_RESET_TIMEOUT)
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> httpx.Client:
+    """
+    Process bo'yicha yagona keep-alive client (TCP/TLS ulanishlar qayta ishlatiladi).
+    Gunicorn fork qilgandan keyin har worker o'z client ini yaratadi.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = httpx.Client(
+                    base_url=AUTH_SERVER_BASE_URL,
+                    timeout=httpx.Timeout(AUTH_SERVICE_TIMEOUT, connect=AUTH_SERVICE_CONNECT_TIMEOUT),
+                    limits=httpx.Limits(
+                        max_connections=AUTH_SERVICE_MAX_CONNECTIONS,
+                        max_keepalive_connections=AUTH_SERVICE_MAX_CONNECTIONS,
+                    ),
+                )
+                _client_pid = os.getpid()
+    return _client
+
+
+def _get(path: str, token: str) -> httpx.Response:
+    """
+    Circuit breaker orqali GET. Ochiq bo'lsa httpx.RequestError ko'tariladi,
+    shunda chaqiruvchilar tarmoq xatosi kabi ishlaydi.
+    """
+    if not breaker.allow():
+        raise httpx.RequestError("Auth server vaqtincha mavjud emas (circuit open)")
 
-async def auth_service_get_current_user(token: str) -> Tuple[Dict, Optional[int]]:
     headers = {
         "Authorization": f"Bearer {token}",
         "Accept": "application/json",
     }
+    try:
+        resp = get_client().get(path, headers=headers)
+    except httpx.RequestError:
+        breaker.record_failure()
+        raise
+    if resp.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return resp
+
+
+def auth_service_verify_sync(token: str) -> Tuple[bool, Optional[int]]:
+    try:
+        resp = _get("/api/verify", token)
+        resp.raise_for_status()
+        return True, resp.status_code
+    except httpx.HTTPStatusError as e:
+        return False, e.response.status_code if e.response else None
+    except httpx.RequestError:
+        return False, None
+
+
+def auth_service_get_current_user_sync(token: str) -> Tuple[Dict, Optional[int]]:
+    try:
+        response = _get("/api/user", token)
+        response.raise_for_status()
+        return response.json(), response.status_code
+    except httpx.HTTPStatusError as e:
+        return {"error": f"Auth failed: {e.response.status_code}"}, e.response.status_code if e.response else None
+    except httpx.RequestError as e:
+        return {"error": f"Request error: {str(e)}"}, None
+
 
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        try:
-            response = await client.get(f"{AUTH_SERVER_BASE_URL}/api/user", headers=headers)
-            response.raise_for_status()
-            return response.json(), response.status_code
-        except httpx.HTTPStatusError as e:
-            return {"error": f"Auth failed: {e.response.status_code}"}, e.response.status_code if e.response else None
-        except httpx.RequestError as e:
-            return {"error": f"Request error: {str(e)}"}, None
+def auth_service_get_revoked_sync() -> Tuple[Optional[list], Optional[int]]:
+    """
+    Bekor qilingan tokenlar ro'yxati: {"revoked": ["<jti yoki sha256>", ...]}
+    Xato bo'lsa (None, status) qaytadi.
+    """
+    try:
+        response = _get(AUTH_REVOCATION_PATH, AUTH_SERVICE_TOKEN)
+        response.raise_for_status()
+        return list(response.json().get("revoked", [])), response.status_code
+    except httpx.HTTPStatusError as e:
+        return None, e.response.status_code if e.response else None
+    except (httpx.RequestError, ValueError):
+        return None, None
+
+
+# Async variantlar ham xuddi shu pooled client dan foydalanadi
+async def auth_service_verify(token: str) -> Tuple[bool, Optional[int]]:
+    return await sync_to_async(auth_service_verify_sync, thread_sensitive=False)(token)
+
+
+async def auth_service_get_current_user(token: str) -> Tuple[Dict, Optional[int]]:
+    return await sync_to_async(auth_service_get_current_user_sync, thread_sensitive=False)(token)
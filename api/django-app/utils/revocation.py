@@ -0,0 +1,59 @@
+"""
+Bekor qilingan (revoked) tokenlar ro'yxati.
+
+Ro'yxat Celery beat orqali auth serverdan olinib Redis ga yoziladi
+(users.tasks.refresh_revoked_tokens). Har worker uni xotirada qisqa
+muddat saqlaydi, shuning uchun tekshiruv tarmoqqa chiqmaydi.
+Ro'yxat Redis da bo'lmasa (sovuq kesh, eviction, beat yiqilgan) holat
+noma'lum hisoblanadi — chaqiruvchi auth server orqali tekshiradi (fail closed).
+"""
+import hashlib
+import logging
+import threading
+import time
+from typing import Optional
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+REVOKED_CACHE_KEY = "auth:revoked"
+REVOKED_CACHE_TIMEOUT = getattr(settings, "AUTH_REVOCATION_CACHE_TIMEOUT", 15 * 60)
+LOCAL_REFRESH_INTERVAL = getattr(settings, "AUTH_REVOCATION_LOCAL_TTL", 10)
+
+_revoked = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def token_id(token: str, payload: dict) -> str:
+    """Token identifikatori: jti bo'lsa o'sha, aks holda token sha256"""
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
+def store_revoked(ids) -> None:
+    cache.set(REVOKED_CACHE_KEY, list(ids), REVOKED_CACHE_TIMEOUT)
+
+
+def _local_revoked() -> Optional[frozenset]:
+    global _revoked, _loaded_at
+    if time.monotonic() - _loaded_at < LOCAL_REFRESH_INTERVAL:
+        return _revoked
+    with _lock:
+        if time.monotonic() - _loaded_at >= LOCAL_REFRESH_INTERVAL:
+            ids = cache.get(REVOKED_CACHE_KEY)
+            if ids is None:
+                logger.error("Revocation list Redis da yo'q — tokenlar auth server orqali tekshiriladi")
+                _revoked = None
+            else:
+                _revoked = frozenset(ids)
+            _loaded_at = time.monotonic()
+    return _revoked
+
+
+def is_revoked(token: str, payload: dict) -> Optional[bool]:
+    """True/False, ro'yxat yuklanmagan bo'lsa None"""
+    revoked = _local_revoked()
+    if revoked is None:
+        return None
+    return token_id(token, payload) in revoked
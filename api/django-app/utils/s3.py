@@ -0,0 +1,337 @@
+"""
+MinIO/S3 bilan ishlash: process bo'yicha yagona pooled client,
+HLS papkalarini parallel yuklash va brauzerdan to'g'ridan-to'g'ri
+multipart upload uchun presigned URL lar.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from django.conf import settings
+
+S3_UPLOAD_WORKERS = getattr(settings, 'S3_UPLOAD_WORKERS', 16)
+S3_UPLOAD_RETRIES = getattr(settings, 'S3_UPLOAD_RETRIES', 3)
+# Brauzer ko'radigan MinIO manzili — presigned URL imzosi Host ga bog'liq
+S3_PRESIGN_ENDPOINT_URL = getattr(settings, 'S3_PRESIGN_ENDPOINT_URL', None)
+
+CONTENT_TYPES = {
+    '.m3u8': 'application/x-mpegURL',
+    '.ts': 'video/MP2T',
+    '.mp4': 'video/mp4',
+    '.m4s': 'video/iso.segment',
+    '.m4a': 'audio/mp4',
+    '.vtt': 'text/vtt',
+    '.jpg': 'image/jpeg',
+}
+
+# Segmentlar kichik — ularni bo'laklab yuklash shart emas. Katta fayllar
+# (masalan, manba bo'laklari) multipart bilan, lekin shu thread ichida yuklanadi,
+# aks holda pool ichida yana pool paydo bo'ladi.
+TRANSFER_CONFIG = TransferConfig(multipart_threshold=16 * 1024 * 1024, use_threads=False)
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_presign_client = None
+
+
+def _make_client(endpoint_url, **config):
+    return boto3.client(
+        's3',
+        endpoint_url=endpoint_url,
+        aws_access_key_id=getattr(settings, 'AWS_ACCESS_KEY_ID', 'minioadmin'),
+        aws_secret_access_key=getattr(settings, 'AWS_SECRET_ACCESS_KEY', 'minioadmin123'),
+        region_name=getattr(settings, 'AWS_S3_REGION_NAME', 'us-east-1'),
+        config=Config(signature_version='s3v4', **config),
+    )
+
+
+def get_s3_client():
+    """
+    Process bo'yicha yagona client. boto3 client thread-safe, ulanishlar
+    pool i yuklash thread lari soniga moslangan. Celery fork qilgandan
+    keyin har child o'z client ini yaratadi.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = _make_client(
+                    getattr(settings, 'AWS_S3_ENDPOINT_URL', 'http://localhost:9000'),
+                    max_pool_connections=S3_UPLOAD_WORKERS,
+                    retries={'max_attempts': S3_UPLOAD_RETRIES, 'mode': 'standard'},
+                )
+                _client_pid = os.getpid()
+    return _client
+
+
+def get_presign_client():
+    """
+    Presigned URL lar uchun client (tarmoqqa murojaat qilmaydi). Ichki
+    endpoint (masalan, http://minio:9000) brauzerga ko'rinmaydi, shuning
+    uchun URL public manzil bilan imzolanadi.
+    """
+    global _presign_client
+    if _presign_client is None:
+        _presign_client = _make_client(
+            S3_PRESIGN_ENDPOINT_URL or getattr(settings, 'AWS_S3_ENDPOINT_URL', 'http://localhost:9000')
+        )
+    return _presign_client
+
+
+def content_type_for(filename):
+    return CONTENT_TYPES.get(os.path.splitext(filename)[1].lower(), 'application/octet-stream')
+
+
+def upload_file(local_path, s3_path, bucket='media', retries=None, client=None):
+    """
+    Bitta faylni yuklash, xato bo'lsa qayta urinish bilan.
+    Yuklangan baytlar sonini qaytaradi.
+    """
+    client = client or get_s3_client()
+    retries = S3_UPLOAD_RETRIES if retries is None else retries
+    extra_args = {'ContentType': content_type_for(local_path), 'ACL': 'public-read'}
+    for attempt in range(retries + 1):
+        try:
+            client.upload_file(local_path, bucket, s3_path, ExtraArgs=extra_args, Config=TRANSFER_CONFIG)
+            return os.path.getsize(local_path)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def upload_directory(local_dir, s3_prefix, bucket='media', workers=None):
+    """
+    Papkani parallel yuklash. Avval segmentlar (bounded thread pool da),
+    ular to'liq yuklangandan keyingina .m3u8 playlistlar — player hech qachon
+    hali yo'q segmentga ishora qiluvchi playlistni ko'rmaydi.
+
+    Qaytadi (manifest):
+        {'files': [{'key': ..., 'bytes': ...}], 'total_bytes': ..., 'failed': [...]}
+    Biror segment yuklanmasa, playlistlar yuklanmaydi va RuntimeError ko'tariladi.
+    """
+    client = get_s3_client()
+    segments, playlists = [], []
+    for root, _, files in os.walk(local_dir):
+        for file in files:
+            local_path = os.path.join(root, file)
+            relative_path = os.path.relpath(local_path, local_dir)
+            s3_path = f"{s3_prefix}/{relative_path}".replace('\\', '/')
+            (playlists if file.endswith('.m3u8') else segments).append((local_path, s3_path))
+
+    manifest = {'files': [], 'total_bytes': 0, 'failed': []}
+
+    def _run(batch):
+        if not batch:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(workers or S3_UPLOAD_WORKERS, len(batch)))) as pool:
+            futures = {
+                pool.submit(upload_file, local_path, s3_path, bucket, None, client): s3_path
+                for local_path, s3_path in batch
+            }
+            for future in as_completed(futures):
+                s3_path = futures[future]
+                try:
+                    size = future.result()
+                except Exception as e:
+                    print(f"Upload xato ({s3_path}): {e}")
+                    manifest['failed'].append(s3_path)
+                    continue
+                manifest['files'].append({'key': s3_path, 'bytes': size})
+                manifest['total_bytes'] += size
+
+    _run(segments)
+    if manifest['failed']:
+        raise RuntimeError(f"{len(manifest['failed'])} ta fayl S3 ga yuklanmadi: {manifest['failed'][:5]}")
+    # Variant playlistlar master dan oldin
+    _run([p for p in playlists if os.path.basename(p[0]) != 'master.m3u8'])
+    _run([p for p in playlists if os.path.basename(p[0]) == 'master.m3u8'])
+    if manifest['failed']:
+        raise RuntimeError(f"{len(manifest['failed'])} ta fayl S3 ga yuklanmadi: {manifest['failed'][:5]}")
+    manifest['files'].sort(key=lambda f: f['key'])
+    return manifest
+
+
+class SegmentUploader:
+    """
+    Kodlash davom etayotganda tayyor segmentlarni yuklab boruvchi fon thread.
+
+    ffmpeg `-hls_flags temp_file` bilan segmentni `.tmp` nomida yozib, yopilgach
+    rename qiladi — shuning uchun papkada ko'ringan har `.ts`/`.m4s` fayl to'liq.
+    Yuklangan segment lokal diskdan o'chiriladi. Playlistlar faqat finish() da,
+    barcha segmentlardan keyin yuklanadi.
+
+        uploader = SegmentUploader(tmp_dir, s3_prefix).start()
+        try:
+            encode(...)
+        except Exception:
+            uploader.abort()
+            raise
+        manifest = uploader.finish()
+    """
+
+    SEGMENT_SUFFIXES = ('.ts', '.m4s')
+
+    def __init__(self, local_dir, s3_prefix, bucket='media', workers=None, interval=0.5):
+        self.local_dir = local_dir
+        self.s3_prefix = s3_prefix
+        self.bucket = bucket
+        self.interval = interval
+        self._pool = ThreadPoolExecutor(max_workers=workers or S3_UPLOAD_WORKERS)
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _scan(self):
+        client = get_s3_client()
+        with self._lock:
+            for root, _, files in os.walk(self.local_dir):
+                for file in files:
+                    if not file.endswith(self.SEGMENT_SUFFIXES):
+                        continue
+                    local_path = os.path.join(root, file)
+                    if local_path in self._futures:
+                        continue
+                    relative_path = os.path.relpath(local_path, self.local_dir)
+                    s3_path = f"{self.s3_prefix}/{relative_path}".replace('\\', '/')
+                    self._futures[local_path] = (s3_path, self._pool.submit(self._upload, local_path, s3_path, client))
+
+    def _upload(self, local_path, s3_path, client):
+        if not os.path.exists(local_path):
+            return None  # encode_hls zaxira yo'lga o'tishda papkani tozalagan
+        try:
+            size = upload_file(local_path, s3_path, self.bucket, None, client)
+        except FileNotFoundError:
+            return None
+        try:
+            os.unlink(local_path)  # disk faqat hali yuklanmagan segmentlarni ushlaydi
+        except FileNotFoundError:
+            pass  # papka tozalangan, lekin obyekt yuklangan — reset() uni o'chiradi
+        return size
+
+    def reset(self):
+        """
+        Yiqilgan urinish segmentlarini S3 dan o'chirish. Lokal papka oldin tozalanishi
+        kerak — aks holda eski segmentlar qayta yuklanadi. Uploader ishlashda davom etadi.
+        """
+        with self._lock:
+            futures, self._futures = self._futures, {}
+        keys = []
+        for s3_path, future in futures.values():
+            try:
+                if future.result() is not None:
+                    keys.append(s3_path)
+            except Exception:
+                continue  # yuklanmagan
+        delete_objects(keys, self.bucket)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self._scan()
+
+    def abort(self):
+        self._stop.set()
+        self._thread.join()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def finish(self):
+        """Qolgan segmentlarni kutib, so'ng playlistlarni yuklash. Manifest qaytaradi"""
+        self._stop.set()
+        self._thread.join()
+        self._scan()
+        manifest = {'files': [], 'total_bytes': 0, 'failed': []}
+        for s3_path, future in self._futures.values():
+            try:
+                size = future.result()
+            except Exception as e:
+                print(f"Upload xato ({s3_path}): {e}")
+                manifest['failed'].append(s3_path)
+                continue
+            if size is None:
+                continue
+            manifest['files'].append({'key': s3_path, 'bytes': size})
+            manifest['total_bytes'] += size
+        self._pool.shutdown(wait=True)
+        if manifest['failed']:
+            raise RuntimeError(f"{len(manifest['failed'])} ta fayl S3 ga yuklanmadi: {manifest['failed'][:5]}")
+
+        rest = upload_directory(self.local_dir, self.s3_prefix, bucket=self.bucket)
+        manifest['files'] = sorted(manifest['files'] + rest['files'], key=lambda f: f['key'])
+        manifest['total_bytes'] += rest['total_bytes']
+        return manifest
+
+
+# -------------------- Brauzerdan multipart upload --------------------
+def create_multipart_upload(key, content_type=None, bucket='media'):
+    """Multipart upload ni boshlash, UploadId qaytaradi"""
+    response = get_s3_client().create_multipart_upload(
+        Bucket=bucket,
+        Key=key,
+        ContentType=content_type or content_type_for(key),
+        ACL='public-read',
+    )
+    return response['UploadId']
+
+
+def presign_upload_parts(key, upload_id, part_count, bucket='media', expires=3600):
+    """Har bo'lak uchun PUT URL — klient ularni parallel yuklaydi va ETag larni qaytaradi"""
+    client = get_presign_client()
+    return [
+        {
+            'part_number': part_number,
+            'url': client.generate_presigned_url(
+                'upload_part',
+                Params={'Bucket': bucket, 'Key': key, 'UploadId': upload_id, 'PartNumber': part_number},
+                ExpiresIn=expires,
+            ),
+        }
+        for part_number in range(1, part_count + 1)
+    ]
+
+
+def complete_multipart_upload(key, upload_id, parts, bucket='media'):
+    """
+    Bo'laklarni bitta obyektga yig'ish. parts — [{'part_number': .., 'etag': ..}].
+    Yakuniy obyekt hajmini qaytaradi.
+    """
+    client = get_s3_client()
+    client.complete_multipart_upload(
+        Bucket=bucket,
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={
+            'Parts': [
+                {'PartNumber': p['part_number'], 'ETag': p['etag']}
+                for p in sorted(parts, key=lambda p: p['part_number'])
+            ]
+        },
+    )
+    return client.head_object(Bucket=bucket, Key=key)['ContentLength']
+
+
+def abort_multipart_upload(key, upload_id, bucket='media'):
+    """Yuklangan bo'laklarni o'chirish (aks holda MinIO da joy egallab qoladi)"""
+    get_s3_client().abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+
+
+def delete_object(key, bucket='media'):
+    get_s3_client().delete_object(Bucket=bucket, Key=key)
+
+
+def delete_objects(keys, bucket='media'):
+    """Bir nechta obyektni o'chirish (DeleteObjects bir so'rovda 1000 tagacha)"""
+    client = get_s3_client()
+    for i in range(0, len(keys), 1000):
+        client.delete_objects(
+            Bucket=bucket, Delete={'Objects': [{'Key': key} for key in keys[i:i + 1000]], 'Quiet': True}
+        )
@@ -0,0 +1,158 @@
+"""
+Full-text qidiruv.
+
+PostgreSQL: oldindan hisoblangan `search_vector` (tsvector) ustuni + GIN indeks,
+natijalar SearchRank bo'yicha tartiblanadi.
+SQLite (test/lokal): xotiradagi inverted index, xuddi shu A/B og'irliklar bilan.
+"""
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, IntegerField, When
+
+SEARCH_CONFIG = 'simple'  # O'zbek tili uchun PostgreSQL da stemmer yo'q
+
+# PostgreSQL ts_rank ning standart og'irliklari (A, B)
+TITLE_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def is_postgres() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def search_vector_expression():
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+class InMemoryIndex:
+    """
+    Oddiy inverted index: term -> {doc_id: og'irlangan tf}.
+    Qidiruv faqat so'rovdagi termlarning posting list lari bo'yicha yuradi,
+    shuning uchun katalog o'sishi bilan sekinlashmaydi.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._doc_terms: Dict[int, set] = {}
+        self._built = False
+        self._lock = threading.Lock()
+
+    def _build(self):
+        for pk, title, description in self.model.objects.values_list('pk', 'title', 'description'):
+            self._add(pk, title, description)
+        self._built = True
+
+    def _add(self, pk, title, description):
+        weights = defaultdict(float)
+        for term in tokenize(title):
+            weights[term] += TITLE_WEIGHT
+        for term in tokenize(description):
+            weights[term] += DESCRIPTION_WEIGHT
+        for term, weight in weights.items():
+            self._postings[term][pk] = weight
+        self._doc_terms[pk] = set(weights)
+
+    def _remove(self, pk):
+        for term in self._doc_terms.pop(pk, ()):
+            docs = self._postings.get(term)
+            if docs is not None:
+                docs.pop(pk, None)
+                if not docs:
+                    del self._postings[term]
+
+    def update(self, pk, title, description):
+        with self._lock:
+            if not self._built:
+                return  # birinchi qidiruvda to'liq quriladi
+            self._remove(pk)
+            self._add(pk, title, description)
+
+    def remove(self, pk):
+        with self._lock:
+            if self._built:
+                self._remove(pk)
+
+    def search(self, query: str) -> List[int]:
+        """Barcha termlarni o'z ichiga olgan hujjatlar, rank bo'yicha kamayish tartibida"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            if not self._built:
+                self._build()
+            postings = [self._postings.get(term, {}) for term in terms]
+            if not all(postings):
+                return []
+            total = max(len(self._doc_terms), 1)
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for docs in postings[1:]:
+                candidates &= docs.keys()
+            scores = {
+                pk: sum(docs[pk] * math.log(1 + total / len(docs)) for docs in postings)
+                for pk in candidates
+            }
+        return sorted(scores, key=lambda pk: (-scores[pk], pk))
+
+
+_indexes: Dict[type, InMemoryIndex] = {}
+
+
+def get_memory_index(model) -> InMemoryIndex:
+    if model not in _indexes:
+        _indexes[model] = InMemoryIndex(model)
+    return _indexes[model]
+
+
+def update_search_index(instance, update_fields=None):
+    """Saqlangan obyekt uchun indeksni yangilash (post_save dan chaqiriladi)"""
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    model = type(instance)
+    if is_postgres():
+        model.objects.filter(pk=instance.pk).update(search_vector=search_vector_expression())
+    else:
+        get_memory_index(model).update(instance.pk, instance.title, instance.description)
+
+
+def remove_from_search_index(instance):
+    if not is_postgres():
+        get_memory_index(type(instance)).remove(instance.pk)
+
+
+def search_queryset(queryset, query: str):
+    """
+    Qidiruv natijalarini relevantlik bo'yicha tartiblangan queryset qilib qaytarish.
+    """
+    if is_postgres():
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        return (
+            queryset.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F('search_vector'), search_query))
+            .order_by('-rank', 'pk')
+        )
+
+    ranked_ids = get_memory_index(queryset.model).search(query)
+    if not ranked_ids:
+        return queryset.none()
+    ordering = Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(ranked_ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ranked_ids).annotate(rank=ordering).order_by('rank')
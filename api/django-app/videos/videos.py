@@ -3,24 +3,13 @@ import tempfile
 import subprocess
 from celery import shared_task
 from django.core.files.base import ContentFile
-from django.conf import settings
-import boto3
-from botocore.exceptions import ClientError
+from utils.s3 import get_s3_client, upload_directory
 
 VIDEO_QUALITIES = [
     {'name': '360p', 'width': 640, 'height': 360, 'bitrate': '800k'},
     {'name': '720p', 'width': 1280, 'height': 720, 'bitrate': '2800k'},
 ]
 
-def get_s3_client():
-    return boto3.client(
-        's3',
-        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        region_name=settings.AWS_S3_REGION_NAME
-    )
-
 def generate_thumbnail(video_path, output_path, timestamp='00:00:01'):
     cmd = [
         'ffmpeg', '-i', video_path,
@@ -57,17 +46,7 @@ def convert_to_hls(input_path, output_dir, qualities=VIDEO_QUALITIES):
     return master_path
 
 def upload_dir_to_s3(local_dir, s3_prefix, bucket='media'):
-    s3 = get_s3_client()
-    uploaded_files = []
-    for root, _, files in os.walk(local_dir):
-        for file in files:
-            local_path = os.path.join(root, file)
-            rel_path = os.path.relpath(local_path, local_dir).replace("\\","/")
-            s3_path = f"{s3_prefix}/{rel_path}"
-            content_type = 'application/x-mpegURL' if file.endswith('.m3u8') else 'video/MP2T'
-            s3.upload_file(local_path, bucket, s3_path, ExtraArgs={'ContentType': content_type, 'ACL':'public-read'})
-            uploaded_files.append(s3_path)
-    return uploaded_files
+    return upload_directory(local_dir, s3_prefix, bucket=bucket)
 
 @shared_task(bind=True, max_retries=3)
 def process_video(self, video_id, model_name='problems.Problem'):